@@ -0,0 +1,186 @@
+import threading
+import numpy as np
+
+class CaptureBuffer:
+    """Preallocated int16 buffer that the PortAudio callback writes into directly.
+
+    The buffer only grows (by doubling) when a recording outlives its initial
+    capacity, so a typical dictation allocates exactly once and the callback
+    never creates per-block copies.
+    """
+
+    def __init__(self, capacity):
+        self.data = np.empty(capacity, dtype=np.int16)
+        self.frames = 0
+
+    def write(self, samples):
+        end = self.frames + len(samples)
+        if end > len(self.data):
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=np.int16)
+            grown[:self.frames] = self.data[:self.frames]
+            self.data = grown
+        self.data[self.frames:end] = samples
+        self.frames = end
+
+    def view(self, start=0, end=None):
+        """Zero-copy view of the captured samples."""
+        end = self.frames if end is None else end
+        return self.data[start:end]
+
+class PreRollRing:
+    """Fixed-size circular int16 buffer holding the most recent audio while idle."""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(max(1, capacity), dtype=np.int16)
+        self.pos = 0
+        self.filled = 0
+
+    def write(self, samples):
+        n, cap = len(samples), len(self.data)
+        if n >= cap:
+            self.data[:] = samples[-cap:]
+            self.pos, self.filled = 0, cap
+            return
+        end = self.pos + n
+        if end <= cap:
+            self.data[self.pos:end] = samples
+        else:
+            split = cap - self.pos
+            self.data[self.pos:] = samples[:split]
+            self.data[:n - split] = samples[split:]
+        self.pos = end % cap
+        self.filled = min(cap, self.filled + n)
+
+    def drain_into(self, buffer):
+        """Copy the ring (oldest first) into a CaptureBuffer and reset it."""
+        if self.filled == len(self.data):
+            buffer.write(self.data[self.pos:])
+        buffer.write(self.data[:self.pos])
+        self.pos = self.filled = 0
+
+class AudioCapture:
+    """Microphone capture into a CaptureBuffer (mono, int16).
+
+    In warm mode the input stream stays open between recordings and keeps the
+    last `preroll_ms` of audio in a PreRollRing, which is prepended when a
+    recording starts. The stream closes itself after `idle_seconds` without a
+    recording and reopens on the next `start`.
+    """
+
+    def __init__(self, sample_rate=16000, channels=1, initial_seconds=30,
+                 warm=False, preroll_ms=300, idle_seconds=300):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.initial_frames = int(initial_seconds * sample_rate)
+        self.warm = warm
+        self.idle_seconds = idle_seconds
+        self.preroll = PreRollRing(int(preroll_ms / 1000 * sample_rate)) if warm else None
+        self.stream = None
+        self.buffer = None
+        self.recording = False
+        self.idle_timer = None
+        # `lock` guards buffer swaps against the callback; `stream_lock` guards open/close.
+        # Never hold `lock` while stopping the stream: stop() waits for the callback.
+        self.lock = threading.Lock()
+        self.stream_lock = threading.RLock()
+
+    @property
+    def frames(self):
+        buffer = self.buffer
+        return buffer.frames if buffer else 0
+
+    def _callback(self, indata, frames, time_info, status):
+        samples = indata[:, 0]
+        with self.lock:
+            if self.recording:
+                self.buffer.write(samples)
+            elif self.preroll is not None:
+                self.preroll.write(samples)
+
+    def _open_stream(self):
+        # Imported on first use: loading PortAudio is slow and not needed until the mic opens
+        import sounddevice as sd
+        with self.stream_lock:
+            if self.stream is not None and self.stream.active:
+                return False
+            self._close_stream()
+            self.stream = sd.InputStream(
+                callback=self._callback, samplerate=self.sample_rate,
+                channels=self.channels, dtype='int16'
+            )
+            self.stream.start()
+            return True
+
+    def _close_stream(self):
+        with self.stream_lock:
+            stream, self.stream = self.stream, None
+            if stream is not None:
+                try:
+                    stream.stop()
+                    stream.close()
+                except Exception:
+                    pass
+            if self.preroll is not None:
+                with self.lock:
+                    self.preroll.pos = self.preroll.filled = 0
+
+    def warm_up(self):
+        """Open the stream ahead of the first hotkey press (warm mode only). Raises on device errors."""
+        if self.warm:
+            self._open_stream()
+            self._schedule_idle_close()
+
+    def start(self):
+        """Start writing into a fresh buffer, opening the stream if needed. Raises on device errors."""
+        self._cancel_idle_close()
+        buffer = CaptureBuffer(self.initial_frames)
+        with self.stream_lock:
+            if not self.warm:
+                self._close_stream()
+            self._open_stream()
+            with self.lock:
+                if self.preroll is not None:
+                    self.preroll.drain_into(buffer)
+                self.buffer = buffer
+                self.recording = True
+
+    def stop(self):
+        """Stop recording and hand over the captured samples (None if nothing was captured).
+
+        The returned array is a view of the buffer; the next `start` allocates a new
+        one, so the caller owns the data without a copy.
+        """
+        if not self.warm:
+            # Stopping first lets PortAudio deliver the blocks still in flight
+            self._close_stream()
+        with self.lock:
+            self.recording = False
+            buffer, self.buffer = self.buffer, None
+        if self.warm:
+            self._schedule_idle_close()
+        if not buffer or buffer.frames == 0:
+            return None
+        return buffer.view()
+
+    def close(self):
+        self._cancel_idle_close()
+        with self.lock:
+            self.recording = False
+        self._close_stream()
+
+    def _schedule_idle_close(self):
+        self._cancel_idle_close()
+        if self.idle_seconds and self.idle_seconds > 0:
+            self.idle_timer = threading.Timer(self.idle_seconds, self._idle_close)
+            self.idle_timer.daemon = True
+            self.idle_timer.start()
+
+    def _cancel_idle_close(self):
+        if self.idle_timer:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+
+    def _idle_close(self):
+        with self.stream_lock:
+            if not self.recording:
+                self._close_stream()
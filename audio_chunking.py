@@ -0,0 +1,132 @@
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import audio_processing
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+FRAME_MS = 20
+# Pause detection looks at ~200 ms of smoothed level so a cut lands between words, not in a consonant gap
+SMOOTH_MS = 200
+
+def plan_chunks(samples, sample_rate, chunk_seconds=45.0, overlap_ms=1000, search_seconds=5.0):
+    """Split points for long audio. Returns [(start, end), ...] sample ranges covering the clip.
+
+    Each cut is placed at the quietest point in the `search_seconds` before the
+    nominal chunk end, and every chunk after the first starts `overlap_ms` before
+    the previous cut so a word on the boundary is heard in full at least once.
+    Clips shorter than 1.5 chunks are returned as a single range.
+    """
+    n = len(samples)
+    chunk = int(chunk_seconds * sample_rate)
+    if chunk <= 0 or n <= chunk * 1.5:
+        return [(0, n)]
+    frame_len = max(1, sample_rate * FRAME_MS // 1000)
+    levels = audio_processing.frame_levels_db(samples, frame_len)
+    smooth = max(1, SMOOTH_MS // FRAME_MS)
+    levels = np.convolve(levels, np.ones(smooth) / smooth, mode='same')
+    search = max(1, int(search_seconds * 1000 / FRAME_MS))
+    overlap = int(overlap_ms / 1000 * sample_rate)
+
+    cuts, start = [], 0
+    while n - start > chunk * 1.5:
+        target = (start + chunk) // frame_len
+        lo = max(start // frame_len + 1, target - search)
+        quietest = lo + int(np.argmin(levels[lo:target + 1]))
+        cut = min(n, quietest * frame_len + frame_len // 2)
+        cuts.append(cut)
+        start = cut
+    bounds = [0] + cuts + [n]
+    return [(max(0, bounds[i] - (overlap if i else 0)), bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+def _words(text):
+    return [re.sub(r"[^\w']", "", w).lower() for w in text.split()]
+
+def merge_overlap(previous, text, max_words=8):
+    """`text` without the words at its start that repeat the end of `previous` (from the overlap)."""
+    prev_words, words = _words(previous), _words(text)
+    raw = text.split()
+    for k in range(min(max_words, len(prev_words), len(words)), 0, -1):
+        if prev_words[-k:] == words[:k] and any(words[:k]):
+            # A single repeated word only counts if it is not a short filler like "a" or "the"
+            if k == 1 and len(words[0]) < 4:
+                continue
+            return " ".join(raw[k:])
+    return text
+
+def merge_transcripts(texts):
+    """Join chunk transcripts in order, de-duplicating words repeated across overlaps. None = failed chunk."""
+    merged = ""
+    for text in texts:
+        if not text:
+            continue
+        merged = f"{merged} {merge_overlap(merged, text)}".strip() if merged else text
+    return merged
+
+def transcribe_chunks(samples, sample_rate, transcribe_fn, chunk_seconds=45.0, overlap_ms=1000,
+                      max_workers=4, search_seconds=5.0, ranges=None):
+    """Transcribe long audio as concurrent chunks and merge the text in order.
+
+    `transcribe_fn(chunk) -> text or None` runs on up to `max_workers` threads.
+    `ranges` skips planning when the caller already ran `plan_chunks`. A chunk
+    that fails (None or an exception) is retried once; if it fails again the
+    whole clip fails rather than returning text with a gap in the middle.
+    Returns (text or None if any chunk failed, number of chunks).
+    """
+    ranges = ranges or plan_chunks(samples, sample_rate, chunk_seconds, overlap_ms, search_seconds)
+    if len(ranges) == 1:
+        return transcribe_fn(samples), 1
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ranges))), thread_name_prefix="stt-chunk") as pool:
+        futures = [pool.submit(transcribe_with_retry, transcribe_fn, samples[start:end]) for start, end in ranges]
+        results = [future.result() for future in futures]
+    failed = [i + 1 for i, r in enumerate(results) if r is None]
+    if failed:
+        print(f" Chunk {', '.join(map(str, failed))} of {len(ranges)} failed twice; not using a partial transcript.")
+        return None, len(ranges)
+    return merge_transcripts(results), len(ranges)
+
+def transcribe_with_retry(transcribe_fn, audio, attempts=2):
+    """`transcribe_fn(audio)`, tried up to `attempts` times. None if every attempt failed."""
+    for _ in range(attempts):
+        try:
+            text = transcribe_fn(audio)
+        except Exception as e:
+            print(f" Attempt fail: {e}")
+            continue
+        if text is not None:
+            return text
+    return None
+
+def decode_upload(stream, sample_rate=16000):
+    """Decode an uploaded recording to mono int16 at `sample_rate`, or None if no decoder handles it.
+
+    WAV/FLAC/OGG go through soundfile (at their own rate); other containers such
+    as the browser's WebM need `ffmpeg` on PATH.
+    """
+    stream.seek(0)
+    if sf is not None:
+        try:
+            data, rate = sf.read(stream, dtype='int16', always_2d=True)
+            return data.mean(axis=1).astype(np.int16), rate
+        except Exception:
+            stream.seek(0)
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+            input=stream.read(), capture_output=True, timeout=120
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    finally:
+        stream.seek(0)
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return np.frombuffer(result.stdout, dtype=np.int16), sample_rate
@@ -0,0 +1,69 @@
+import io
+import time
+import wave
+import numpy as np
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+def to_int16(samples):
+    """Return mono int16 PCM, converting float capture data if needed (no copy for int16)."""
+    samples = np.asarray(samples).reshape(-1)
+    if samples.dtype == np.int16:
+        return samples
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+def encode_wav(samples, sample_rate, compression_level=None):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(to_int16(samples))
+    return buf.getvalue()
+
+def encode_flac(samples, sample_rate, compression_level=None):
+    buf = io.BytesIO()
+    sf.write(buf, to_int16(samples), sample_rate, format="FLAC", subtype="PCM_16")
+    return buf.getvalue()
+
+def encode_opus(samples, sample_rate, compression_level=0.9):
+    # compression_level runs from 0.0 (highest bitrate) to 1.0 (lowest bitrate)
+    buf = io.BytesIO()
+    sf.write(buf, to_int16(samples), sample_rate, format="OGG", subtype="OPUS",
+             compression_level=compression_level)
+    return buf.getvalue()
+
+# name -> (file extension, encoder, needs soundfile)
+ENCODERS = {
+    "wav": ("wav", encode_wav, False),
+    "flac": ("flac", encode_flac, True),
+    "opus": ("ogg", encode_opus, True),
+}
+
+_warned = set()
+
+def encode(samples, sample_rate, fmt="flac", compression_level=0.9):
+    """Encode audio into an in-memory upload payload.
+
+    Returns (filename, bytes, stats). Formats that need `soundfile` fall back to
+    WAV when it is not installed.
+    """
+    fmt = fmt if fmt in ENCODERS else "wav"
+    if ENCODERS[fmt][2] and sf is None:
+        if fmt not in _warned:
+            print(f"\n[!] soundfile not installed, '{fmt}' encoding unavailable. Falling back to WAV.")
+            _warned.add(fmt)
+        fmt = "wav"
+
+    ext, encoder, _ = ENCODERS[fmt]
+    start = time.perf_counter()
+    payload = encoder(samples, sample_rate, compression_level)
+    stats = {
+        "format": fmt,
+        "bytes": len(payload),
+        "encode_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    return f"recording.{ext}", payload, stats
@@ -0,0 +1,73 @@
+import numpy as np
+
+# Floor used when converting silence (RMS 0) to decibels
+DB_FLOOR = -120.0
+
+def to_float(samples):
+    """Return mono samples as float32 in [-1, 1] regardless of the capture dtype."""
+    samples = np.asarray(samples).reshape(-1)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+def frame_levels_db(samples, frame_len):
+    """RMS level (dBFS) of consecutive frames. A trailing partial frame is included."""
+    x = to_float(samples)
+    if len(x) == 0:
+        return np.empty(0, dtype=np.float32)
+    n_frames = -(-len(x) // frame_len)
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(x)] = x
+    frames = padded.reshape(n_frames, frame_len)
+    # Average the partial frame over its real length only
+    lengths = np.full(n_frames, frame_len, dtype=np.float32)
+    lengths[-1] = len(x) - (n_frames - 1) * frame_len
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / lengths)
+    with np.errstate(divide='ignore'):
+        return np.maximum(20 * np.log10(rms), DB_FLOOR)
+
+def trim_silence(samples, sample_rate, threshold_db=-40.0, padding_ms=200, max_pause_ms=700,
+                 min_speech_ms=150, frame_ms=20):
+    """Trim leading/trailing silence and shorten internal pauses to `max_pause_ms`.
+
+    Returns (trimmed, stats). `trimmed` is None when the clip holds less than
+    `min_speech_ms` of audio above `threshold_db`, so the caller can drop it
+    before any API call.
+    """
+    samples = np.asarray(samples).reshape(-1)
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    levels = frame_levels_db(samples, frame_len)
+    voiced = levels > threshold_db
+    stats = {
+        "audio_seconds": round(len(samples) / sample_rate, 2),
+        "trimmed_seconds": 0.0,
+    }
+    if voiced.sum() * frame_ms < min_speech_ms:
+        return None, stats
+
+    # Pad voiced regions so soft onsets and decays survive the cut
+    pad = int(round(padding_ms / frame_ms))
+    if pad:
+        voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode='same') > 0
+
+    # Locate silent runs and decide per frame what to keep:
+    # runs touching either edge are dropped, internal runs keep at most max_pause frames
+    n = len(voiced)
+    edges = np.diff(np.concatenate(([0], (~voiced).astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    max_pause = int(max_pause_ms / frame_ms)
+    head, tail = max_pause // 2, max_pause - max_pause // 2
+
+    pos = np.flatnonzero(~voiced)
+    run_start = np.repeat(starts, lengths)
+    run_end = np.repeat(ends, lengths)
+    is_edge = np.repeat((starts == 0) | (ends == n), lengths)
+    keep_silent = ~is_edge & (((pos - run_start) < head) | ((run_end - pos) <= tail))
+
+    keep = voiced.copy()
+    keep[pos] = keep_silent
+    mask = np.repeat(keep, frame_len)[:len(samples)]
+    trimmed = samples[mask]
+    stats["trimmed_seconds"] = round(len(trimmed) / sample_rate, 2)
+    return trimmed, stats
@@ -0,0 +1,138 @@
+"""End-to-end benchmark of the desktop hotkey pipeline (GroqSTT), fully offline.
+
+Fixture audio is played through a fake `sounddevice`, the hotkey is pressed and
+released programmatically and the API is the local fake server. Pastes and the
+clipboard are faked, history goes to a temp directory.
+
+    python benchmarks/bench_pipeline.py --dictations 20 --seconds 6 --speed 4
+    python benchmarks/bench_pipeline.py --streaming --stt-ms 800 --rate-limit-rate 0.05
+"""
+import os
+import sys
+import time
+import types
+import shutil
+import argparse
+import tempfile
+
+from harness import (PROJECT_ROOT, install_desktop_fakes, neutralize_output, NullIndicator, MemoryTracker,
+                     summarize, print_summary, print_stage_table, write_json)
+from fake_groq import start_server, add_server_arguments, server_options
+from fixtures import fixture_path, load_fixture
+from latency_report import load_entries
+
+def build_app(args, workdir):
+    """Import main with fakes in place and build a GroqSTT that writes only into `workdir`."""
+    microphone = install_desktop_fakes()
+    microphone.speed = args.speed
+    import main
+
+    # History, cache and config files go to the temp directory, not the project root
+    history_file = os.path.join(workdir, "history.log")
+    main.BASE_DIR = workdir
+    shutil.copy(os.path.join(PROJECT_ROOT, "config.json"), workdir)
+
+    overrides = {
+        "play_sounds": False,
+        "action_mode": "type_and_copy",
+        "streaming_enabled": args.streaming,
+        "warm_mic_enabled": args.warm_mic,
+        "refinement_enabled": not args.no_refine,
+        "refinement_streaming": args.stream_refinement,
+        "refinement_cache_enabled": args.cache,
+        "pipeline_workers": args.workers,
+        "pipeline_max_pending": args.max_pending,
+    }
+
+    class BenchSTT(main.GroqSTT):
+        def load_config(self):
+            super().load_config()
+            self.config.update(overrides)
+            for profile in self.config['profiles']:
+                profile.pop('stream_refinement', None)
+
+        def _print_banner(self):
+            pass
+
+    app = BenchSTT(NullIndicator())
+    keyboard = neutralize_output(main, app)
+    return app, microphone, keyboard, history_file
+
+def run(args):
+    fixtures = [load_fixture(fixture_path(args.seconds, seed=i))[0] for i in range(args.variants)]
+    server = start_server(**server_options(args))
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    workdir = tempfile.mkdtemp(prefix="groq-stt-bench-")
+
+    app, microphone, keyboard, history_file = build_app(args, workdir)
+    app.capture.warm_up()
+    profile = app.config['profiles'][0]
+    chord = [types.SimpleNamespace(name=name) for name in profile['key_names']]
+
+    print(f"Running {args.dictations} dictations of {args.seconds:g}s (playback x{args.speed:g}) "
+          f"against {server.base_url} ...", flush=True)
+    with MemoryTracker(args.tracemalloc) as memory:
+        started = time.perf_counter()
+        for i in range(args.dictations):
+            for key in chord:
+                app.on_press(key)
+            # Recording starts on the control thread
+            while not app.recording:
+                time.sleep(0.001)
+            microphone.queue(fixtures[i % len(fixtures)])
+            microphone.wait_drained()
+            time.sleep(2 * 512 / app.sample_rate / args.speed)  # let the last blocks arrive
+            for key in reversed(chord):
+                app.on_release(key)
+            time.sleep(args.gap)
+
+        deadline = time.monotonic() + args.timeout
+        while app.pipeline.depth and time.monotonic() < deadline:
+            time.sleep(0.05)
+        wall = time.perf_counter() - started
+    app.capture.close()
+    app.history_writer.flush()
+
+    entries = [e for e in load_entries(history_file) if e.get("timings_ms")]
+    totals = [e["timings_ms"]["total"] for e in entries if "total" in e["timings_ms"]]
+    results = {
+        "scenario": "hotkey pipeline" + (" (streaming)" if args.streaming else ""),
+        "dictations": args.dictations,
+        "delivered": len(entries),
+        "pastes": keyboard.pastes,
+        "wall_seconds": round(wall, 2),
+        "audio_seconds": round(args.dictations * args.seconds, 1),
+        "throughput_per_min": round(len(entries) / wall * 60, 1),
+        "release_to_delivery_ms": summarize(totals),
+        "memory": memory.result(),
+        "keyboard_hook": app.hook_watchdog.summary(),
+        "fake_api": dict(server.stats),
+    }
+    print()
+    print_summary("HOTKEY PIPELINE BENCHMARK", results)
+    print_stage_table(history_file)
+    write_json(args.json, results)
+    server.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the desktop hotkey pipeline")
+    parser.add_argument("--dictations", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=6, help="length of each fixture")
+    parser.add_argument("--variants", type=int, default=3, help="number of different fixtures to rotate through")
+    parser.add_argument("--speed", type=float, default=4, help="fixture playback speed (1 = real time)")
+    parser.add_argument("--gap", type=float, default=0.2, help="seconds between release and the next press")
+    parser.add_argument("--timeout", type=float, default=120, help="max seconds to wait for the queue to drain")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=4)
+    parser.add_argument("--streaming", action="store_true", help="transcribe segments while recording")
+    parser.add_argument("--warm-mic", action="store_true")
+    parser.add_argument("--stream-refinement", action="store_true")
+    parser.add_argument("--no-refine", action="store_true")
+    parser.add_argument("--cache", action="store_true", help="enable the refinement cache (temp cache.db)")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--json", help="write results to this file")
+    add_server_arguments(parser)
+    run(parser.parse_args())
+    sys.exit(0)
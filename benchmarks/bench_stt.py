@@ -0,0 +1,96 @@
+"""Compares the STT engines by latency per second of audio, fully offline.
+
+"groq" is the remote engine against the local fake server (so its numbers are
+whatever `--stt-ms`/`--stt-ms-per-kb` simulate plus encoding); "local" runs the
+faster-whisper int8 model on this CPU; "fallback" is Groq with the local model
+taking over after `--fallback-seconds`. The local model is loaded once before
+the runs; its load time is reported separately.
+
+    python benchmarks/bench_stt.py --seconds 5 15 45 --runs 3 --local-model base.en
+    python benchmarks/bench_stt.py --engines fallback --stt-ms 6000 --fallback-seconds 2
+    python benchmarks/bench_stt.py --audio my_recording.wav   # real speech instead of the synthetic fixtures
+"""
+import os
+import sys
+import time
+import argparse
+
+from harness import summarize, print_summary, write_json
+from fake_groq import start_server, add_server_arguments, server_options
+from fixtures import fixture_path, load_fixture
+import stt_engines
+from stt_engines import STTEngines, LOCAL_PREFIX
+from groq_client import create_client
+from rate_limiter import RateLimiter
+from stage_timer import StageTimer
+
+def load_clips(args):
+    if args.audio:
+        return [(os.path.basename(path), *load_fixture(path)) for path in args.audio]
+    return [(f"{seconds:g}s", *load_fixture(fixture_path(seconds))) for seconds in args.seconds]
+
+def run(args):
+    api = start_server(**server_options(args))
+    os.environ["GROQ_BASE_URL"] = api.base_url
+    client = create_client("fake-key")
+    config = {
+        "audio_format": "flac",
+        "stt_fallback_enabled": True,
+        "stt_fallback_seconds": args.fallback_seconds,
+        "local_stt_model": args.local_model,
+        "local_stt_threads": args.threads,
+    }
+    engines = STTEngines(client, RateLimiter.from_config({"rate_limits": {"*": {"rpm": 100000}}}).call)
+    models = {"groq": "whisper-large-v3-turbo", "local": LOCAL_PREFIX + args.local_model,
+              "fallback": "whisper-large-v3-turbo"}
+    wanted = [e for e in args.engines if e == "groq" or stt_engines.LOCAL_AVAILABLE]
+    if len(wanted) < len(args.engines):
+        print("[!] faster-whisper is not installed; only the Groq engine is measured (pip install faster-whisper)")
+    clips = load_clips(args)
+
+    results = {"local_model": args.local_model, "cpu_threads": args.threads or "auto"}
+    if any(name != "groq" for name in wanted):
+        # Loaded once up front so neither local nor fallback runs include the model load
+        start = time.perf_counter()
+        try:
+            stt_engines.load_local_model(args.local_model, args.threads)
+            results["local_load_ms"] = round((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            print(f"[!] Local model {args.local_model} could not be loaded, skipping local engines: {e}")
+            wanted = [name for name in wanted if name == "groq"]
+    for name in wanted:
+        model = models[name]
+        engine = engines.remote if name == "groq" else engines.local if name == "local" else engines.fallback
+        for label, samples, rate in clips:
+            seconds = len(samples) / rate
+            per_second, fallbacks, text = [], 0, ""
+            for _ in range(args.runs):
+                timer = StageTimer()
+                start = time.perf_counter()
+                text = engine.transcribe(samples, rate, model, config, timer)
+                per_second.append((time.perf_counter() - start) * 1000 / seconds)
+                fallbacks += timer.values.get("stt_fallback", 0)
+            key = f"{name} {label}"
+            results[key] = dict(summarize(per_second), fallbacks=fallbacks if name == "fallback" else None)
+            print(f"  {key:<16}: {results[key]['p50']} ms per audio second, text {text[:50]!r}", flush=True)
+
+    print()
+    print_summary("STT ENGINES (ms per second of audio)", results)
+    write_json(args.json, results)
+    api.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency per audio second of the Groq, local and fallback STT engines")
+    parser.add_argument("--engines", nargs="+", default=["groq", "local", "fallback"],
+                        choices=["groq", "local", "fallback"])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 15, 45], help="synthetic fixture lengths")
+    parser.add_argument("--audio", nargs="+", help="WAV/FLAC files to use instead of the fixtures")
+    parser.add_argument("--runs", type=int, default=3, help="transcriptions per engine and clip")
+    parser.add_argument("--local-model", default="base.en", help="faster-whisper model size or path")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for the local model (0 = all cores)")
+    parser.add_argument("--fallback-seconds", type=float, default=4, help="stt_fallback_seconds for the fallback engine")
+    parser.add_argument("--json", help="write results to this file")
+    add_server_arguments(parser)
+    run(parser.parse_args())
+    sys.exit(0)
@@ -0,0 +1,141 @@
+"""Load test for the web server's /api/record endpoint, fully offline.
+
+Serves web_server/app.py with Waitress (as in production) against the fake API
+and fires fixture uploads from a pool of concurrent clients. History goes to a
+temp directory; Flask-Limiter's per-IP limit is switched off for the run.
+
+    python benchmarks/bench_web.py --requests 100 --concurrency 8
+    python benchmarks/bench_web.py --error-rate 0.05 --rate-limit-rate 0.05
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from harness import PROJECT_ROOT, MemoryTracker, summarize, print_summary, print_stage_table, write_json
+from fake_groq import start_server, add_server_arguments, server_options
+from fixtures import fixture_path
+from response_cache import CACHE_FILE, open_refinement_cache, open_transcription_cache
+from history_store import HISTORY_DB, open_history_store
+from history_writer import HistoryWriter
+
+def build_server(args, workdir):
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, "web_server"))
+    project_files = [os.path.join(PROJECT_ROOT, name) for name in (CACHE_FILE, HISTORY_DB)]
+    existing = {path for path in project_files if os.path.exists(path)}
+    import app as web_app
+    from waitress.server import create_server
+
+    web_app.HISTORY_PATH = os.path.join(workdir, "history.log")
+    web_app.history_writer.close()
+    web_app.history_store = open_history_store(workdir)
+    web_app.history_writer = HistoryWriter(web_app.HISTORY_PATH, web_app.history_store)
+    web_app.limiter.enabled = False
+    # The app opens its caches and history in the project root on import; swap in fresh ones under `workdir`
+    config = web_app.load_config()
+    for cache in (web_app.refinement_cache, web_app.transcription_cache):
+        if cache: cache.close()
+    web_app.refinement_cache = open_refinement_cache(config, workdir) if args.cache else None
+    web_app.transcription_cache = open_transcription_cache(config, workdir) if args.cache else None
+    for path in project_files:
+        if path in existing:
+            continue
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    server = create_server(web_app.app, host="127.0.0.1", port=0, threads=args.threads)
+    threading.Thread(target=server.run, name="waitress", daemon=True).start()
+    return server, web_app.HISTORY_PATH
+
+def close_server(server):
+    # Let Waitress finish the last responses before its trigger pipe goes away
+    time.sleep(0.2)
+    server.close()
+    import app as web_app
+    web_app.history_writer.flush()
+
+def run(args):
+    payloads = []
+    for i in range(args.variants):
+        with open(fixture_path(args.seconds, seed=i), "rb") as f:
+            payloads.append(f.read())
+    api = start_server(**server_options(args))
+    os.environ["GROQ_BASE_URL"] = api.base_url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    workdir = tempfile.mkdtemp(prefix="groq-stt-bench-")
+    server, history_file = build_server(args, workdir)
+    url = f"http://127.0.0.1:{server.effective_port}/api/record"
+
+    local = threading.local()
+    clients = []
+    def send(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(timeout=args.timeout)
+            clients.append(client)
+        payload = payloads[i % len(payloads)]
+        if args.unique:
+            # Distinct bytes per request so the transcription cache cannot short-circuit
+            payload += i.to_bytes(4, "little")
+        start = time.perf_counter()
+        try:
+            response = client.post(url, files={"audio": ("recording.webm", payload, "audio/webm")},
+                                   data={"profile": "General", "duration_ms": str(int(args.seconds * 1000))})
+            status = response.status_code
+            ok = status == 200 and response.json().get("status") == "success"
+        except httpx.HTTPError as e:
+            status, ok = type(e).__name__, False
+        return (time.perf_counter() - start) * 1000, status, ok
+
+    print(f"Sending {args.requests} uploads ({len(payloads[0]) / 1024:.0f} KB) with concurrency "
+          f"{args.concurrency} to {url} ...", flush=True)
+    with MemoryTracker(args.tracemalloc) as memory:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(send, range(args.requests)))
+        wall = time.perf_counter() - started
+    for client in clients:
+        client.close()
+    close_server(server)
+
+    latencies = [ms for ms, status, ok in results if ok]
+    results = {
+        "scenario": "web /api/record",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "succeeded": len(latencies),
+        "status_codes": dict(Counter(str(status) for _, status, _ in results)),
+        "wall_seconds": round(wall, 2),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "latency_ms": summarize(latencies),
+        "memory": memory.result(),
+        "fake_api": dict(api.stats),
+    }
+    print()
+    print_summary("WEB SERVER BENCHMARK", results)
+    print_stage_table(history_file)
+    write_json(args.json, results)
+    api.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test of the web server's /api/record")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="Waitress worker threads (production default is 4)")
+    parser.add_argument("--seconds", type=float, default=6, help="length of the uploaded fixture")
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120, help="per-request client timeout")
+    parser.add_argument("--cache", action="store_true", help="keep the refinement/transcription caches enabled")
+    parser.add_argument("--no-unique", dest="unique", action="store_false",
+                        help="re-send identical payloads (exercises the transcription cache with --cache)")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--json", help="write results to this file")
+    add_server_arguments(parser)
+    run(parser.parse_args())
+    sys.exit(0)
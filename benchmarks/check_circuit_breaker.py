@@ -0,0 +1,92 @@
+"""Checks that the circuit breaker never gets stuck half-open.
+
+Opens the breaker with transient (5xx) failures, lets the cooldown pass and
+then ends the single half-open trial in each possible way: success, transient
+failure, a 429, and a client-side RateLimitTimeout before the request is sent.
+After a 429 or a timeout the trial has no verdict, so the very next call must
+be let through instead of failing fast forever. No network; the API calls are
+stand-in functions raising the Groq SDK's own error types. Exits non-zero on failure.
+
+    python benchmarks/check_circuit_breaker.py
+    python benchmarks/check_circuit_breaker.py --cooldown 0.5
+"""
+import sys
+import time
+import argparse
+
+import httpx
+import groq
+import harness  # noqa: F401  (puts the project root on sys.path)
+from rate_limiter import RateLimiter, CircuitOpenError, RateLimitTimeout
+
+MODEL = "whisper-large-v3-turbo"
+
+def api_error(status):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.groq.invalid/openai/v1/audio"))
+    cls = groq.RateLimitError if status == 429 else groq.InternalServerError
+    return cls(f"status {status}", response=response, body=None)
+
+def fails_with(status):
+    def call():
+        raise api_error(status)
+    return call
+
+def ok():
+    return "ok"
+
+def outcome(limiter, func):
+    try:
+        limiter.call(func, MODEL)
+        return "ok"
+    except CircuitOpenError:
+        return "circuit_open"
+    except RateLimitTimeout:
+        return "timeout"
+    except groq.RateLimitError:
+        return "429"
+    except groq.InternalServerError:
+        return "5xx"
+
+def half_open_limiter(args):
+    """A limiter whose breaker has just reached half-open."""
+    limiter = RateLimiter(limits={MODEL: {"rpm": 100000}}, retries=1, max_wait=0,
+                          breaker_threshold=args.threshold, breaker_cooldown=args.cooldown)
+    for _ in range(args.threshold):
+        outcome(limiter, fails_with(500))
+    opened = limiter.breaker.state
+    time.sleep(args.cooldown * 1.1)
+    return limiter, opened
+
+def run(args):
+    # (trial call, client bucket blocked, expected trial outcome, expected state after, expected next call)
+    cases = [
+        ("success", ok, False, "ok", "closed", "ok"),
+        ("transient failure", fails_with(500), False, "5xx", "open", "circuit_open"),
+        ("rate limited (429)", fails_with(429), False, "429", "half_open", "ok"),
+        ("limiter timeout", ok, True, "timeout", "half_open", "ok"),
+    ]
+    failures = 0
+    for name, trial, blocked, want_trial, want_state, want_next in cases:
+        limiter, opened = half_open_limiter(args)
+        if blocked:
+            # The trial would have to wait a minute for its bucket; max_wait 0 makes acquire raise
+            limiter.for_model(MODEL).block(60)
+        got_trial = outcome(limiter, trial)
+        if blocked:
+            limiter.models.clear()
+        state = limiter.breaker.state
+        got_next = outcome(limiter, ok)
+        passed = opened == "open" and (got_trial, state, got_next) == (want_trial, want_state, want_next)
+        failures += not passed
+        print(f"  trial {name:<20}: {'OK  ' if passed else 'FAIL'} trial {got_trial}, then {state}, "
+              f"next call {got_next} (expected {want_trial}, {want_state}, {want_next})")
+
+    print(f"\n{'PASS' if not failures else 'FAIL'}: {len(cases) - failures}/{len(cases)} half-open trials resolved")
+    return not failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Half-open trial check for the rate limiter's circuit breaker")
+    parser.add_argument("--threshold", type=int, default=2, help="transient failures that open the breaker")
+    parser.add_argument("--cooldown", type=float, default=0.2, help="breaker cooldown in seconds")
+    args = parser.parse_args()
+    sys.exit(0 if run(args) else 1)
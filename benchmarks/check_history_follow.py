@@ -0,0 +1,80 @@
+"""Checks that `history_viewer --follow` reports every new entry exactly once.
+
+Follows a temporary history.log while the shared HistoryWriter appends
+entries, a web-style delete purges one of them from the journal (which
+replaces the file) and a small rotation size forces renames to .1/.2. The
+follower must yield each appended entry once: nothing missed, and no old
+entries repeated after a purge or a rotation. Exits non-zero on failure.
+
+    python benchmarks/check_history_follow.py
+    python benchmarks/check_history_follow.py --rounds 10 --rotate-kb 2
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+import harness  # noqa: F401  (puts the project root on sys.path)
+from history_journal import follow
+from history_store import entry_line, entry_uid, purge_from_journal
+from history_writer import HistoryWriter
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="groq-stt-follow-")
+    log_file = os.path.join(workdir, "history.log")
+    writer = HistoryWriter(log_file, max_bytes=args.rotate_kb * 1024, flush_interval=0.01)
+    writer.write({"timestamp": "2026-01-01 00:00:00", "raw_text": "before follow"})
+    writer.flush()
+
+    followed = []
+    def collect():
+        for entry in follow(log_file, interval=args.interval):
+            followed.append(entry["raw_text"])
+    threading.Thread(target=collect, name="follow", daemon=True).start()
+    time.sleep(args.interval * 3)
+
+    written = []
+    for r in range(args.rounds):
+        lines = []
+        for i in range(args.entries):
+            entry = {"timestamp": "2026-01-01 00:00:00", "raw_text": f"round {r} entry {i}", "padding": "x" * 200}
+            line = entry_line(entry)
+            lines.append(line)
+            # Queue the exact line so its uid is known for the purge below
+            writer.write(dict(entry, uid=entry_uid(line)))
+            written.append(entry["raw_text"])
+        writer.flush()
+        time.sleep(args.interval * 3)
+        # Delete the first entry of this round the way the web server does
+        with writer.locked():
+            purge_from_journal(log_file, [entry_uid(lines[0])])
+        time.sleep(args.interval * 3)
+
+    deadline = time.monotonic() + 5
+    while len(followed) < len(written) and time.monotonic() < deadline:
+        time.sleep(args.interval)
+    time.sleep(args.interval * 3)
+    writer.close()
+
+    missing = [text for text in written if text not in followed]
+    repeated = sorted({text for text in followed if followed.count(text) > 1})
+    unexpected = [text for text in followed if text not in written]
+    rotations = sum(os.path.exists(f"{log_file}.{i}") for i in (1, 2))
+    print(f"  written {len(written)}, followed {len(followed)}, rotated files {rotations}")
+    print(f"  missing   : {'OK  ' if not missing else 'FAIL'} {missing[:5]}")
+    print(f"  repeated  : {'OK  ' if not repeated else 'FAIL'} {repeated[:5]}")
+    print(f"  unexpected: {'OK  ' if not unexpected else 'FAIL'} {unexpected[:5]}")
+    passed = not (missing or repeated or unexpected)
+    print(f"\n{'PASS' if passed else 'FAIL'}: follow across {args.rounds} purges and {rotations} rotated files")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="history_journal.follow check across purges and rotation")
+    parser.add_argument("--rounds", type=int, default=6, help="append + purge rounds")
+    parser.add_argument("--entries", type=int, default=4, help="entries appended per round")
+    parser.add_argument("--rotate-kb", type=int, default=3, help="history.log size that triggers rotation")
+    parser.add_argument("--interval", type=float, default=0.05, help="follow poll interval in seconds")
+    args = parser.parse_args()
+    sys.exit(0 if run(args) else 1)
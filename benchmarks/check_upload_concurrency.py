@@ -0,0 +1,79 @@
+"""Checks that parallel /api/record uploads each get their own transcript.
+
+All clients upload different audio at the same moment; the fake API ends each
+transcript with a hash of the audio it actually received, so any request that
+was answered with someone else's upload is caught. Also checks that an upload
+above the size limit is rejected with 413. Exits non-zero on failure.
+
+    python benchmarks/check_upload_concurrency.py --uploads 16
+    python benchmarks/check_upload_concurrency.py --spill-kb 0   # every upload via a temp file
+"""
+import os
+import sys
+import hashlib
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from fake_groq import start_server
+from fixtures import fixture_path
+from bench_web import build_server, close_server
+
+def run(args):
+    api = start_server(stt_ms=args.stt_ms, chat_ms=20, chat_ms_per_token=0, echo_digest=1)
+    os.environ["GROQ_BASE_URL"] = api.base_url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    server, _ = build_server(argparse.Namespace(cache=False, threads=args.uploads), tempfile.mkdtemp(prefix="groq-stt-check-"))
+    import app as web_app
+    web_app.app.config['MAX_CONTENT_LENGTH'] = args.max_upload_kb * 1024
+    if args.spill_kb is not None:
+        web_app.UploadRequest.spill_bytes = args.spill_kb * 1024
+    url = f"http://127.0.0.1:{server.effective_port}/api/record"
+
+    payloads = []
+    for i in range(args.uploads):
+        with open(fixture_path(args.seconds, seed=100 + i), "rb") as f:
+            payloads.append(f.read())
+    start = threading.Barrier(args.uploads)
+
+    def upload(i):
+        with httpx.Client(timeout=60) as client:
+            start.wait()
+            response = client.post(url, files={"audio": ("recording.webm", payloads[i], "audio/webm")},
+                                   data={"profile": "General"})
+        expected = hashlib.sha256(payloads[i]).hexdigest()[:12]
+        raw = response.json().get("raw", "") if response.status_code == 200 else ""
+        return response.status_code, expected, raw
+
+    print(f"Uploading {args.uploads} different recordings in parallel to {url} ...")
+    with ThreadPoolExecutor(max_workers=args.uploads) as pool:
+        results = list(pool.map(upload, range(args.uploads)))
+
+    failures = 0
+    for i, (status, expected, raw) in enumerate(results):
+        ok = status == 200 and raw.endswith(f"[{expected}]")
+        failures += not ok
+        print(f"  upload {i:>2}: {'OK  ' if ok else 'FAIL'} status {status}, expected [{expected}], got {raw[-14:]!r}")
+
+    oversized = os.urandom(args.max_upload_kb * 1024 + 1)
+    response = httpx.post(url, files={"audio": ("recording.webm", oversized, "audio/webm")}, timeout=60)
+    too_large_ok = response.status_code == 413
+    print(f"  oversized upload: {'OK  ' if too_large_ok else 'FAIL'} status {response.status_code}")
+
+    close_server(server)
+    api.shutdown()
+    passed = failures == 0 and too_large_ok
+    print(f"\n{'PASS' if passed else 'FAIL'}: {args.uploads - failures}/{args.uploads} uploads got their own transcript")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel-upload isolation check for /api/record")
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3, help="length of each fixture")
+    parser.add_argument("--stt-ms", type=float, default=300, help="fake STT latency (keeps the requests overlapping)")
+    parser.add_argument("--spill-kb", type=int, help="override web_upload_spill_kb (0 = always spill)")
+    parser.add_argument("--max-upload-kb", type=int, default=1024, help="upload limit used for the check")
+    args = parser.parse_args()
+    sys.exit(0 if run(args) else 1)
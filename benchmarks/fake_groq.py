@@ -0,0 +1,198 @@
+"""Local stand-in for the Groq API (transcriptions, chat completions, model list).
+
+Point either app at it with GROQ_BASE_URL=http://127.0.0.1:<port>. Latency,
+server errors and 429s are configurable so retries, rate limiting and
+pipelining can be measured without a real key:
+
+    python benchmarks/fake_groq.py --port 8765 --stt-ms 400 --rate-limit-rate 0.05
+"""
+import json
+import time
+import hashlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the quick brown fox jumps over the lazy dog while the team reviews "
+         "the quarterly numbers and plans the next release").split()
+
+DEFAULTS = {
+    "stt_ms": 300,              # fixed transcription latency
+    "stt_ms_per_kb": 0.5,       # plus upload-size dependent latency
+    "chat_ms": 250,             # time to first token
+    "chat_ms_per_token": 4,     # generation speed (~4 chars per token)
+    "models_ms": 20,
+    "error_rate": 0.0,          # fraction of API calls answered with a 503
+    "rate_limit_rate": 0.0,     # fraction of API calls answered with a 429
+    "retry_after": 1.0,         # Retry-After seconds sent with 429s
+    "jitter": 0.1,              # +/- fraction applied to every latency
+    "echo_digest": 0,           # 1 = end transcripts with "[<sha256 of the audio>[:12]]"
+}
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, **options):
+        self.options = dict(DEFAULTS, **options)
+        self.stats = {"requests": 0, "transcriptions": 0, "chats": 0, "errors": 0, "rate_limited": 0, "bytes_in": 0}
+        self.stats_lock = threading.Lock()
+        self.random = random.Random(1234)
+        super().__init__(address, FakeGroqHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def sleep(self, ms):
+        jitter = self.options["jitter"]
+        time.sleep(max(0.0, ms * (1 + self.random.uniform(-jitter, jitter))) / 1000)
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.count("bytes_in", len(body))
+        return body
+
+    def _injected_failure(self):
+        """Answer with a 429 or 503 if the dice say so. Returns True if a failure was sent."""
+        options, rng = self.server.options, self.server.random
+        if options["rate_limit_rate"] and rng.random() < options["rate_limit_rate"]:
+            self.server.count("rate_limited")
+            self._send_json(429, {"error": {"message": "Rate limit reached (fake server)", "type": "tokens",
+                                            "code": "rate_limit_exceeded"}},
+                            {"retry-after": f"{options['retry_after']:g}"})
+            return True
+        if options["error_rate"] and rng.random() < options["error_rate"]:
+            self.server.count("errors")
+            self._send_json(503, {"error": {"message": "Service unavailable (fake server)", "type": "internal_server_error"}})
+            return True
+        return False
+
+    def do_GET(self):
+        self.server.count("requests")
+        if self.path.rstrip("/").endswith("/models"):
+            self.server.sleep(self.server.options["models_ms"])
+            models = ["whisper-large-v3", "whisper-large-v3-turbo", "llama-3.3-70b-versatile"]
+            self._send_json(200, {"object": "list", "data": [
+                {"id": m, "object": "model", "created": 0, "owned_by": "fake"} for m in models]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        self.server.count("requests")
+        body = self._read_body()
+        if self.path.endswith("/audio/transcriptions"):
+            self._transcription(body)
+        elif self.path.endswith("/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _file_part(self, body):
+        """Content of the multipart `file` field."""
+        boundary = self.headers.get("Content-Type", "").partition("boundary=")[2].strip('"').encode()
+        for part in body.split(b"--" + boundary):
+            head, _, content = part.partition(b"\r\n\r\n")
+            if b'name="file"' in head:
+                return content[:-2] if content.endswith(b"\r\n") else content
+        return b""
+
+    def _transcription(self, body):
+        if self._injected_failure():
+            return
+        options = self.server.options
+        self.server.sleep(options["stt_ms"] + options["stt_ms_per_kb"] * len(body) / 1024)
+        self.server.count("transcriptions")
+        # Roughly 2.5 words per second of speech at ~4 KB/s of FLAC
+        count = max(1, len(body) // 1600)
+        text = " ".join(WORDS[i % len(WORDS)] for i in range(count))
+        text = f" {text.capitalize()}."
+        if options["echo_digest"]:
+            text += f" [{hashlib.sha256(self._file_part(body)).hexdigest()[:12]}]"
+        self._send_json(200, {"text": text, "x_groq": {"id": "fake"}})
+
+    def _chat(self, request):
+        if self._injected_failure():
+            return
+        options = self.server.options
+        messages = request.get("messages") or [{}]
+        user_text = (messages[-1].get("content") or "").strip()
+        reply = user_text[:1].upper() + user_text[1:]
+        if reply and reply[-1] not in ".!?":
+            reply += "."
+        self.server.sleep(options["chat_ms"])
+        self.server.count("chats")
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "fake")}
+
+        if not request.get("stream"):
+            self.server.sleep(options["chat_ms_per_token"] * len(reply) / 4)
+            self._send_json(200, dict(base, object="chat.completion", choices=[
+                {"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                usage={"prompt_tokens": len(user_text) // 4, "completion_tokens": len(reply) // 4,
+                       "total_tokens": (len(user_text) + len(reply)) // 4}))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            delta = word if i == 0 else " " + word
+            self.server.sleep(options["chat_ms_per_token"] * len(delta) / 4)
+            chunk = dict(base, object="chat.completion.chunk",
+                         choices=[{"index": 0, "delta": {"content": delta}, "finish_reason": None}])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        done = dict(base, object="chat.completion.chunk", choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """Start the fake API on a background thread. Returns the server (see `base_url`, `stats`)."""
+    server = FakeGroqServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server
+
+def add_server_arguments(parser):
+    for key, value in DEFAULTS.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=float, default=value, dest=key)
+
+def server_options(args):
+    return {key: getattr(args, key) for key in DEFAULTS}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Groq API for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server = FakeGroqServer((args.host, args.port), **server_options(args))
+    print(f"Fake Groq API on {server.base_url} (set GROQ_BASE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
@@ -0,0 +1,96 @@
+"""Drop-in for the parts of `sounddevice` the app uses; plays WAV fixtures instead of a microphone.
+
+`install()` registers this module as `sounddevice` before the app is imported.
+Queue audio with `microphone.queue(samples)`; open input streams deliver it in
+real time (or `speed` times faster) through their callback, followed by a low
+noise floor once the queue runs dry.
+"""
+import sys
+import time
+import threading
+import numpy as np
+
+BLOCK_FRAMES = 512
+
+class FakeMicrophone:
+    def __init__(self):
+        self.pending = []
+        self.lock = threading.Lock()
+        self.drained = threading.Event()
+        self.drained.set()
+        self.speed = 1.0
+        self.rng = np.random.default_rng(0)
+
+    def queue(self, samples):
+        with self.lock:
+            self.pending.append(np.asarray(samples, dtype=np.int16).reshape(-1))
+            self.drained.clear()
+
+    def read(self, frames):
+        out = np.empty(frames, dtype=np.int16)
+        filled = 0
+        with self.lock:
+            while filled < frames and self.pending:
+                head = self.pending[0]
+                take = min(frames - filled, len(head))
+                out[filled:filled + take] = head[:take]
+                filled += take
+                if take == len(head): self.pending.pop(0)
+                else: self.pending[0] = head[take:]
+            if not self.pending:
+                self.drained.set()
+        if filled < frames:
+            out[filled:] = self.rng.normal(0, 60, frames - filled).astype(np.int16)
+        return out
+
+    def wait_drained(self, timeout=None):
+        return self.drained.wait(timeout)
+
+microphone = FakeMicrophone()
+
+class PortAudioError(Exception):
+    pass
+
+class InputStream:
+    def __init__(self, samplerate=16000, channels=1, dtype='int16', callback=None, blocksize=0, **kwargs):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize or BLOCK_FRAMES
+        self.active = False
+        self.closed = False
+        self.thread = None
+
+    def start(self):
+        if self.closed:
+            raise PortAudioError("Stream is closed")
+        self.active = True
+        self.thread = threading.Thread(target=self._run, name="fake-audio-input", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        next_block = time.perf_counter()
+        while self.active:
+            block = microphone.read(self.blocksize)
+            indata = np.repeat(block[:, None], self.channels, axis=1)
+            if self.callback:
+                self.callback(indata, self.blocksize, None, None)
+            next_block += self.blocksize / self.samplerate / microphone.speed
+            time.sleep(max(0.0, next_block - time.perf_counter()))
+
+    def stop(self):
+        self.active = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def close(self):
+        self.stop()
+        self.closed = True
+
+def query_devices():
+    return [{"name": "Fake fixture microphone", "max_input_channels": 1, "max_output_channels": 0,
+             "default_samplerate": 16000.0}]
+
+def install():
+    sys.modules["sounddevice"] = sys.modules[__name__]
+    return microphone
@@ -0,0 +1,43 @@
+"""Synthetic speech-like WAV fixtures, generated on demand (nothing binary is checked in)."""
+import os
+import numpy as np
+import soundfile as sf
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SAMPLE_RATE = 16000
+
+def synth_speech(seconds, sample_rate=SAMPLE_RATE, seed=0, pause_every=2.5, pause_seconds=0.6):
+    """int16 mono audio: voiced syllable bursts (harmonics + amplitude envelope), pauses and a noise floor.
+
+    It is not intelligible, but it has the level structure the silence trimming
+    and pause detection care about.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    pitch = 110 + 30 * np.sin(2 * np.pi * 0.3 * t + rng.uniform(0, np.pi))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None) ** 0.5
+    envelope = syllables.copy()
+    # Phrases separated by pauses, plus silence at both ends
+    cycle = pause_every + pause_seconds
+    envelope[(t % cycle) > pause_every] = 0
+    envelope[(t < 0.4) | (t > seconds - 0.4)] = 0
+    audio = 0.25 * voice * envelope + rng.normal(0, 0.002, n)
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+
+def fixture_path(seconds, seed=0):
+    """Path of a WAV fixture, creating it on first use."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"speech_{seconds:g}s_{seed}.wav")
+    if not os.path.exists(path):
+        sf.write(path, synth_speech(seconds, seed=seed), SAMPLE_RATE, subtype="PCM_16")
+    return path
+
+def load_fixture(path):
+    """(int16 samples, sample rate)"""
+    samples, sample_rate = sf.read(path, dtype="int16", always_2d=False)
+    if samples.ndim > 1:
+        samples = samples[:, 0]
+    return samples, sample_rate
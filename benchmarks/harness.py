@@ -0,0 +1,154 @@
+"""Shared pieces for the offline benchmarks: headless desktop fakes, memory tracking and reporting."""
+import os
+import sys
+import json
+import types
+import tracemalloc
+from contextlib import contextmanager
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import fake_sounddevice
+from latency_report import percentile, collect, print_table, load_entries
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class FakeKeyboardController:
+    """Counts Ctrl+V pastes instead of typing into whatever window has focus."""
+
+    def __init__(self):
+        self.pastes = 0
+
+    @contextmanager
+    def pressed(self, *keys):
+        yield
+
+    def tap(self, key):
+        if key == 'v':
+            self.pastes += 1
+
+    def press(self, key): pass
+    def release(self, key): pass
+
+class FakeClipboard:
+    def __init__(self):
+        self.text = ""
+
+    def copy(self, text):
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+class NullIndicator:
+    """Stands in for the Tk status pill."""
+    def show(self, *args, **kwargs): pass
+    def hide(self): pass
+    def update_text(self, *args, **kwargs): pass
+    def set_queue_depth(self, depth): pass
+    def prerender(self, profile_names): pass
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+def install_desktop_fakes():
+    """Make `main` importable headless on any OS. Returns the fake microphone.
+
+    `sounddevice` is always replaced (audio comes from fixtures). winsound,
+    pynput and pystray are only faked when they cannot be imported (or have
+    no display); otherwise their output side is neutralized after import
+    (see `neutralize_output`).
+    """
+    microphone = fake_sounddevice.install()
+    try:
+        import winsound
+    except ImportError:
+        sys.modules["winsound"] = _module("winsound", Beep=lambda frequency, duration: None)
+    try:
+        import pynput.keyboard
+    except Exception:  # missing, or no display to attach to
+        class Key:
+            ctrl = ctrl_l = ctrl_r = alt = alt_l = alt_r = alt_gr = shift = shift_l = shift_r = cmd = space = None
+        class KeyCode:
+            @classmethod
+            def from_char(cls, char): return char
+        class Listener:
+            def __init__(self, *args, **kwargs): pass
+            def start(self): pass
+            def stop(self): pass
+            def join(self, *args): pass
+        keyboard = _module("pynput.keyboard", Key=Key, KeyCode=KeyCode, Controller=FakeKeyboardController,
+                           Listener=Listener)
+        sys.modules["pynput"] = _module("pynput", keyboard=keyboard)
+        sys.modules["pynput.keyboard"] = keyboard
+    try:
+        import pystray
+    except Exception:
+        sys.modules["pystray"] = _module("pystray", Menu=lambda *a, **k: None, MenuItem=lambda *a, **k: None,
+                                         Icon=lambda *a, **k: None)
+    return microphone
+
+def neutralize_output(main_module, app):
+    """Keep a benchmark run from pasting into the focused window or overwriting the clipboard."""
+    app.keyboard_controller = FakeKeyboardController()
+    main_module.pyperclip = FakeClipboard()
+    return app.keyboard_controller
+
+class MemoryTracker:
+    """Peak RSS (Unix) and, optionally, peak traced Python heap during a run."""
+
+    def __init__(self, trace_python=False):
+        self.trace_python = trace_python
+
+    def __enter__(self):
+        if self.trace_python:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.python_peak_mb = None
+        if self.trace_python:
+            self.python_peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            tracemalloc.stop()
+        self.rss_peak_mb = None
+        if resource:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # KB on Linux, bytes on macOS
+            self.rss_peak_mb = round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+        return False
+
+    def result(self):
+        return {"rss_peak_mb": self.rss_peak_mb, "python_peak_mb": self.python_peak_mb}
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {"n": 0}
+    return {"n": len(values), "p50": round(percentile(values, 50), 1), "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1), "max": round(values[-1], 1)}
+
+def print_summary(title, results):
+    print("=" * 72)
+    print(f"   📊 {title}")
+    print("=" * 72)
+    for key, value in results.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{k} {v}" for k, v in value.items() if v is not None)
+        print(f"  {key:<22}: {value}")
+
+def print_stage_table(history_file):
+    entries = [e for e in load_entries(history_file) if e.get("timings_ms")]
+    if entries:
+        print_table("Per-stage latency (ms, from history entries)", collect(entries, lambda e, s: ""), show_group=False)
+
+def write_json(path, results):
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults written to {path}")
@@ -0,0 +1,117 @@
+import os
+import copy
+import json
+import time
+import tempfile
+import threading
+
+class ConfigStore:
+    """config.json access shared by the desktop app, the web server and the settings CLI.
+
+    `get()` returns an in-memory snapshot that is only re-parsed when the file's
+    (mtime, size, inode) changes, so frequent reads cost one `stat`. `save()`
+    writes to a temp file in the same directory and renames it over the original,
+    so other readers see either the old or the new file, never a partial one.
+    Callbacks registered with `subscribe()` run whenever a new version is seen,
+    whether it was saved here or by another process.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.config = None
+        self.signature = None
+        self.subscribers = []
+        self.lock = threading.RLock()
+        self.watch_thread = None
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self):
+        """Current config (shared snapshot: treat it as read-only, use `load()` to edit)."""
+        signature = self._signature()
+        with self.lock:
+            if self.config is not None and signature == self.signature:
+                return self.config
+            if signature is None:
+                config = {}
+            else:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        config = json.load(f)
+                except (OSError, ValueError) as e:
+                    if self.config is None:
+                        raise
+                    # Keep serving the last good version (e.g. a hand edit in progress)
+                    print(f"[WARN] Could not reload {os.path.basename(self.path)}: {e}")
+                    self.signature = signature
+                    return self.config
+            changed = self.config is not None and config != self.config
+            self.config, self.signature = config, signature
+        if changed:
+            self._notify(config)
+        return config
+
+    def load(self):
+        """Private, editable copy of the current config."""
+        return copy.deepcopy(self.get())
+
+    def save(self, config):
+        """Atomically replace the file with `config` and notify subscribers."""
+        directory = os.path.dirname(self.path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".config-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                # Keys sorted at every level, so a save that changes nothing produces no diff
+                f.write(json.dumps(config, indent=2, sort_keys=True))
+                f.flush()
+                os.fsync(f.fileno())
+            self._replace(temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        snapshot = copy.deepcopy(config)
+        with self.lock:
+            self.config, self.signature = snapshot, self._signature()
+        self._notify(snapshot)
+
+    def _replace(self, temp_path, attempts=5):
+        # On Windows the rename fails while another process has the file open; retry briefly
+        for attempt in range(attempts):
+            try:
+                os.replace(temp_path, self.path)
+                return
+            except PermissionError:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    def subscribe(self, callback):
+        """`callback(config)` runs (on the detecting thread) for every new version of the file."""
+        self.subscribers.append(callback)
+
+    def _notify(self, config):
+        for callback in list(self.subscribers):
+            try:
+                callback(config)
+            except Exception as e:
+                print(f"[WARN] Config listener failed: {e}")
+
+    def watch(self, interval=1.0):
+        """Poll the file in the background so subscribers hear about edits made by other processes."""
+        if self.watch_thread:
+            return
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.get()
+                except Exception as e:
+                    print(f"[WARN] Config watch failed: {e}")
+        self.watch_thread = threading.Thread(target=poll, name="config-watch", daemon=True)
+        self.watch_thread.start()
@@ -0,0 +1,103 @@
+import time
+import queue
+import threading
+from stage_timer import StageTimer
+
+class DictationJob:
+    """One captured utterance plus snapshots of everything needed to process it.
+
+    The profile and config are copied when the hotkey is released, so later
+    hotkey presses or config edits cannot change how this job is handled.
+    """
+
+    def __init__(self, audio, profile, config, streamer=None, timer=None):
+        self.seq = None
+        self.released = time.perf_counter()
+        self.processed = None
+        self.timer = timer or StageTimer()
+        self.audio = audio
+        self.profile = dict(profile) if profile else None
+        self.config = dict(config)
+        self.streamer = streamer
+        self.raw_text = None
+        self.refined_text = None
+        self.stream_refinement = False
+        self.stats = {}
+
+    @property
+    def profile_name(self):
+        return self.profile['name'] if self.profile else "General"
+
+class OrderedPipeline:
+    """Bounded job queue with a worker pool that delivers results in submission order.
+
+    `process_fn(job)` runs concurrently on `workers` threads. `deliver_fn(job)` runs
+    on a single delivery thread, strictly in the order jobs were submitted, even if
+    a later job finishes processing first. At most `max_pending` jobs may be queued,
+    processing or awaiting delivery; `submit` rejects anything beyond that.
+    """
+
+    def __init__(self, process_fn, deliver_fn, workers=2, max_pending=4, on_depth_change=None):
+        self.process_fn = process_fn
+        self.deliver_fn = deliver_fn
+        self.max_pending = max_pending
+        self.on_depth_change = on_depth_change
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.finished = {}
+        self.next_seq = 0
+        self.next_delivery = 0
+        self.pending = 0
+        self.cond = threading.Condition()
+
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"dictation-worker-{i}", daemon=True).start()
+        threading.Thread(target=self._deliverer, name="dictation-delivery", daemon=True).start()
+
+    @property
+    def depth(self):
+        return self.pending
+
+    def submit(self, job):
+        """Queue a job without blocking. Returns False if the pipeline is full."""
+        with self.cond:
+            if self.pending >= self.max_pending:
+                return False
+            job.seq = self.next_seq
+            self.next_seq += 1
+            self.pending += 1
+            self.jobs.put_nowait(job)
+            depth = self.pending
+        self._notify(depth)
+        return True
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                self.process_fn(job)
+            except Exception as e:
+                print(f" Processing fail: {e}")
+            with self.cond:
+                self.finished[job.seq] = job
+                self.cond.notify_all()
+
+    def _deliverer(self):
+        while True:
+            with self.cond:
+                while self.next_delivery not in self.finished:
+                    self.cond.wait()
+                job = self.finished.pop(self.next_delivery)
+                self.next_delivery += 1
+            try:
+                self.deliver_fn(job)
+            except Exception as e:
+                print(f" Delivery fail: {e}")
+            with self.cond:
+                self.pending -= 1
+                depth = self.pending
+            self._notify(depth)
+
+    def _notify(self, depth):
+        if self.on_depth_change:
+            try: self.on_depth_change(depth)
+            except Exception: pass
@@ -0,0 +1,76 @@
+import time
+import threading
+import httpx
+from groq import Groq, DefaultHttpxClient
+
+def create_client(api_key, keepalive_seconds=120):
+    """Groq client whose pooled connections stay open for `keepalive_seconds` while idle.
+
+    httpx drops idle connections after 5 s by default, which means nearly every
+    dictation would pay for DNS + TCP + TLS again. The SDK's own retries are
+    disabled; rate_limiter.RateLimiter handles retries for both apps.
+    """
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=5, keepalive_expiry=keepalive_seconds)
+    )
+    return Groq(api_key=api_key, http_client=http_client, max_retries=0)
+
+class ConnectionWarmer:
+    """Prepares a pooled API connection in the background while the user is still speaking.
+
+    `warm()` issues a cheap request (model list) on a background thread. If no API
+    call happened within the keepalive window the request has to open a new
+    connection (cold); otherwise it reuses the pooled one (warm). Both latencies
+    are tracked so the log shows how much a warm connection saves. While the pooled
+    connection has more than `rewarm_margin_seconds` of its keepalive left, `warm()`
+    does nothing, so back-to-back dictations do not each send a request.
+    """
+
+    def __init__(self, client, keepalive_seconds=120, rewarm_margin_seconds=15):
+        self.client = client
+        self.keepalive_seconds = keepalive_seconds
+        # A dictation takes a while; refresh a connection that would expire before the upload
+        self.rewarm_margin_seconds = min(rewarm_margin_seconds, keepalive_seconds / 2)
+        self.last_used = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.samples = {"cold": [], "warm": []}
+
+    def mark_used(self):
+        self.last_used = time.monotonic()
+
+    def is_warm(self):
+        return self.last_used is not None and time.monotonic() - self.last_used < self.keepalive_seconds
+
+    def needs_warming(self):
+        return self.last_used is None or \
+            time.monotonic() - self.last_used >= self.keepalive_seconds - self.rewarm_margin_seconds
+
+    def warm(self):
+        if not self.needs_warming():
+            return
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._warm, name="api-warmup", daemon=True)
+            self.thread.start()
+
+    def _warm(self):
+        kind = "warm" if self.is_warm() else "cold"
+        start = time.perf_counter()
+        try:
+            self.client.models.list()
+        except Exception as e:
+            print(f" [net warm-up failed: {e}]", end="", flush=True)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.mark_used()
+        self.samples[kind] = (self.samples[kind] + [elapsed_ms])[-50:]
+        print(f" [net {kind} {elapsed_ms:.0f} ms{self._report()}]", end="", flush=True)
+
+    def _report(self):
+        cold, warm = self.samples["cold"], self.samples["warm"]
+        if not cold or not warm:
+            return ""
+        saved = sum(cold) / len(cold) - sum(warm) / len(warm)
+        return f", warm saves ~{saved:.0f} ms"
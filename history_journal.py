@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import time
+from collections import deque
+
+LOG_FILE = "history.log"
+BACKUP_COUNT = 2  # matches the RotatingFileHandler in main.py
+BLOCK_SIZE = 64 * 1024
+RECENT_LINES = 1000
+
+def journal_files(log_file=LOG_FILE, backup_count=BACKUP_COUNT):
+    """Existing journal segments, oldest first (history.log.2, history.log.1, history.log)."""
+    paths = [f"{log_file}.{i}" for i in range(backup_count, 0, -1)] + [log_file]
+    return [p for p in paths if os.path.exists(p)]
+
+def read_lines_reversed(path, block_size=BLOCK_SIZE):
+    """Yield the lines of a file last to first, reading fixed-size blocks from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + tail).split(b"\n")
+            # The first piece may continue in the previous block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line.decode("utf-8", errors="replace")
+        if tail.strip():
+            yield tail.decode("utf-8", errors="replace")
+
+def parse_entry(line):
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+def iter_entries(log_file=LOG_FILE, backup_count=BACKUP_COUNT):
+    """Entries oldest first, one line in memory at a time."""
+    for path in journal_files(log_file, backup_count):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                entry = parse_entry(line)
+                if entry is not None:
+                    yield entry
+
+def iter_entries_reversed(log_file=LOG_FILE, backup_count=BACKUP_COUNT):
+    """Entries newest first across the live log and its rotated backups."""
+    for path in reversed(journal_files(log_file, backup_count)):
+        for line in read_lines_reversed(path):
+            entry = parse_entry(line)
+            if entry is not None:
+                yield entry
+
+def entry_filter(since=None, profile=None, model=None, grep=None):
+    """Predicate for entries matching all given filters (`grep` is a case-insensitive regex over the texts)."""
+    pattern = re.compile(grep, re.IGNORECASE) if grep else None
+    def matches(entry):
+        if since and entry.get("timestamp", "") < since:
+            return False
+        if profile and entry.get("profile") != profile:
+            return False
+        if model and model not in (entry.get("stt_model"), entry.get("refinement_model")):
+            return False
+        if pattern and not (pattern.search(entry.get("raw_text") or "") or pattern.search(entry.get("refined_text") or "")):
+            return False
+        return True
+    return matches
+
+def recent_entries(log_file=LOG_FILE, limit=10, since=None, profile=None, model=None, grep=None):
+    """Up to `limit` matching entries, newest first. Stops reading at the first entry older than `since`."""
+    matches = entry_filter(None, profile, model, grep)
+    found = []
+    for entry in iter_entries_reversed(log_file):
+        if since and entry.get("timestamp", "") < since:
+            break
+        if matches(entry):
+            found.append(entry)
+            if len(found) >= limit:
+                break
+    return found
+
+def _parse_lines(lines, seen):
+    for line in lines:
+        entry = parse_entry(line.decode("utf-8", errors="replace"))
+        if entry is not None:
+            seen.append(hash(line.strip()))
+            yield entry
+
+def _same_file(path, ident):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return (st.st_dev, st.st_ino) == ident
+
+def _resume_offset(f, seen):
+    """Offset just past the last complete line of `f` that was already yielded (its end if none is left)."""
+    offset = end = 0
+    resume = None
+    for line in f:
+        offset += len(line)
+        if line.endswith(b"\n"):
+            end = offset
+            if hash(line.strip()) in seen:
+                resume = offset
+    return end if resume is None else resume
+
+def follow(log_file=LOG_FILE, interval=1.0):
+    """Yield entries appended to the log from now on.
+
+    Survives rotation (file renamed to `.1` or truncated): the new file is read
+    from the top. A file replaced in place, as `purge_from_journal` does after a
+    delete, holds the old lines minus the deleted ones, so reading resumes after
+    the last line already yielded instead of repeating the whole log.
+    """
+    f, ident, pending = None, None, b""
+    first_open, rewritten = True, False
+    # Recently yielded lines, to find the resume point in a rewritten file
+    seen = deque(maxlen=RECENT_LINES)
+    try:
+        while True:
+            if f is None:
+                if not os.path.exists(log_file):
+                    time.sleep(interval)
+                    continue
+                f = open(log_file, "rb")
+                st = os.fstat(f.fileno())
+                ident = (st.st_dev, st.st_ino)
+                # Only the first file is joined at its end; after a rotation the new file is read from the top
+                if first_open:
+                    f.seek(0, os.SEEK_END)
+                    first_open = False
+                elif rewritten:
+                    f.seek(_resume_offset(f, set(seen)))
+                    rewritten = False
+            chunk = f.read(BLOCK_SIZE)
+            if chunk:
+                # A trailing partial line waits for the writer to finish it
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                yield from _parse_lines(lines, seen)
+                continue
+            time.sleep(interval)
+            try:
+                st = os.stat(log_file)
+                replaced = (st.st_dev, st.st_ino) != ident
+                switch = replaced or st.st_size < f.tell()
+            except FileNotFoundError:
+                replaced = switch = True
+            if switch:
+                # Drain what reached the old file before the rename, then switch to the new one
+                yield from _parse_lines((pending + f.read()).split(b"\n"), seen)
+                f.close()
+                f, pending = None, b""
+                # A rotation moved our file to .1; a new inode anywhere else is a rewrite of the same journal
+                rewritten = replaced and os.path.exists(log_file) and not _same_file(f"{log_file}.1", ident)
+    finally:
+        if f is not None:
+            f.close()
@@ -0,0 +1,271 @@
+import os
+import json
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+
+from history_journal import LOG_FILE as HISTORY_LOG, BACKUP_COUNT as LOG_BACKUP_COUNT, journal_files
+
+HISTORY_DB = "history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    profile TEXT,
+    stt_model TEXT,
+    refinement_model TEXT,
+    raw_text TEXT,
+    refined_text TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_profile ON entries (profile, id);
+CREATE INDEX IF NOT EXISTS entries_stt_model ON entries (stt_model, id);
+CREATE INDEX IF NOT EXISTS entries_refinement_model ON entries (refinement_model, id);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    raw_text, refined_text, content='entries', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, raw_text, refined_text) VALUES (new.id, new.raw_text, new.refined_text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, raw_text, refined_text)
+    VALUES ('delete', old.id, old.raw_text, old.refined_text);
+END;
+"""
+
+def new_uid():
+    return os.urandom(8).hex()
+
+def entry_line(entry):
+    """The JSONL line an entry is journaled as in history.log (without newline).
+
+    A `uid` field is added if the entry has none, so two identical dictations
+    logged in the same second are still two entries.
+    """
+    if "uid" not in entry:
+        entry = dict(entry, uid=new_uid())
+    return json.dumps(entry)
+
+def line_hash(line):
+    return hashlib.sha256(line.strip().encode("utf-8")).hexdigest()[:32]
+
+def entry_uid(line):
+    """Stable identity of a journal line; used to de-duplicate imports and to purge deleted entries.
+
+    The line's `uid` field, or for lines journaled before entries carried one, a hash of the line.
+    """
+    try:
+        uid = json.loads(line).get("uid")
+    except (json.JSONDecodeError, AttributeError):
+        uid = None
+    return uid if isinstance(uid, str) and uid else line_hash(line)
+
+def base_uid(uid):
+    """Legacy duplicates are imported as "<hash>-<n>"; every copy of the line shares the hash."""
+    return uid.split("-", 1)[0]
+
+def fts_query(text):
+    """User search text -> FTS5 query: every word must match, the last one as a prefix."""
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+class HistoryStore:
+    """Transcription history in SQLite (WAL), shared by the desktop app, web server and viewer.
+
+    Entries get a stable integer `id`. Listing uses keyset pagination on `id`
+    (newest first), so deep pages cost the same as the first one. Search uses
+    an FTS5 index over raw and refined text (falls back to LIKE if the SQLite
+    build lacks FTS5). history.log stays the append-only journal; `import_log`
+    copies it (and its rotated backups) in once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.fts = True
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            try:
+                db.executescript(FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                print(f"[WARN] History search without full-text index: {e}")
+                self.fts = False
+
+    def _connect(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def _row(self, entry, line=None, uid=None):
+        line = line or entry_line(entry)
+        return (uid or entry_uid(line), entry.get("timestamp", ""), entry.get("profile"), entry.get("stt_model"),
+                entry.get("refinement_model"), entry.get("raw_text"), entry.get("refined_text"), line)
+
+    def add(self, entry):
+        """Store one entry (as logged) and return its id."""
+        ids = self.add_many([entry])
+        return ids[0] if ids else None
+
+    def add_many(self, entries, lines=None, uids=None):
+        """Store entries in one transaction. Entries already present (same uid) are skipped."""
+        rows = [self._row(e, lines[i] if lines else None, uids[i] if uids else None) for i, e in enumerate(entries)]
+        ids = []
+        with self._connect() as db:
+            for row in rows:
+                cur = db.execute("INSERT OR IGNORE INTO entries "
+                                 "(uid, timestamp, profile, stt_model, refinement_model, raw_text, refined_text, data) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+                if cur.rowcount:
+                    ids.append(cur.lastrowid)
+        return ids
+
+    def _entry(self, row):
+        entry = json.loads(row["data"])
+        entry["id"] = row["id"]
+        return entry
+
+    def get(self, entry_id):
+        row = self._connect().execute("SELECT id, data FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def delete(self, entry_id):
+        """Delete by id. Returns the deleted entry's uid, or None if it did not exist."""
+        with self._connect() as db:
+            row = db.execute("SELECT uid FROM entries WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return None
+            db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+        return row["uid"]
+
+    def find_by_uid(self, uid):
+        """Id of the entry with this uid, or None."""
+        row = self._connect().execute("SELECT id FROM entries WHERE uid = ?", (uid,)).fetchone()
+        return row["id"] if row else None
+
+    def find_by_timestamp(self, timestamp):
+        """Ids of entries with this timestamp (legacy delete API), newest first."""
+        rows = self._connect().execute("SELECT id FROM entries WHERE timestamp = ? ORDER BY id DESC", (timestamp,))
+        return [r["id"] for r in rows]
+
+    def page(self, limit=50, cursor=None, query=None, profile=None, model=None, since=None):
+        """Newest-first entries older than `cursor` (an id). Returns (entries, next_cursor or None)."""
+        where, params = [], []
+        join = ""
+        if cursor:
+            where.append("e.id < ?"); params.append(int(cursor))
+        if profile:
+            where.append("e.profile = ?"); params.append(profile)
+        if model:
+            where.append("(e.stt_model = ? OR e.refinement_model = ?)"); params += [model, model]
+        if since:
+            where.append("e.timestamp >= ?"); params.append(since)
+        if query and query.strip():
+            if self.fts:
+                join = "JOIN entries_fts f ON f.rowid = e.id"
+                where.append("entries_fts MATCH ?"); params.append(fts_query(query))
+            else:
+                for word in query.split():
+                    where.append("(e.raw_text LIKE ? OR e.refined_text LIKE ?)")
+                    params += [f"%{word}%", f"%{word}%"]
+        sql = f"SELECT e.id, e.data FROM entries e {join}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.id DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = self._connect().execute(sql, params).fetchall()
+        entries = [self._entry(r) for r in rows[:limit]]
+        next_cursor = entries[-1]["id"] if len(rows) > limit else None
+        return entries, next_cursor
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def import_log(self, log_path, backup_count=LOG_BACKUP_COUNT, force=False):
+        """Copy history.log and its rotated backups into the store (once). Returns the number imported."""
+        with self._connect() as db:
+            done = db.execute("SELECT value FROM meta WHERE key = 'log_imported'").fetchone()
+        if done and not force:
+            return 0
+        imported = 0
+        # Identical legacy lines (no uid field) are numbered in journal order so each copy is kept
+        seen = Counter()
+        for path in journal_files(log_path, backup_count):
+            entries, lines, uids = [], [], []
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(entry, dict) and "timestamp" in entry:
+                        line = line.rstrip("\n")
+                        uid = entry_uid(line)
+                        seen[uid] += 1
+                        entries.append(entry)
+                        lines.append(line)
+                        uids.append(uid if seen[uid] == 1 else f"{uid}-{seen[uid]}")
+            imported += len(self.add_many(entries, lines, uids))
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('log_imported', '1')")
+        return imported
+
+def purge_from_journal(log_path, uids, backup_count=LOG_BACKUP_COUNT):
+    """Remove the journal lines of deleted entries (by uid) from history.log and its backups.
+
+    Copies of an identical legacy line are interchangeable, so "<hash>-<n>" removes one of them.
+    """
+    uids = Counter(base_uid(uid) for uid in uids)
+    for path in [log_path] + [f"{log_path}.{i}" for i in range(1, backup_count + 1)]:
+        if not +uids or not os.path.exists(path):
+            continue
+        removed = False
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            # Owns the descriptor from here on, even if the source cannot be opened or read
+            dst = os.fdopen(fd, "w", encoding="utf-8")
+        except BaseException:
+            os.close(fd)
+            os.remove(temp_path)
+            raise
+        try:
+            with dst, open(path, "r", encoding="utf-8", errors="replace") as src:
+                for line in src:
+                    uid = entry_uid(line) if line.strip() else None
+                    if uids.get(uid):
+                        uids[uid] -= 1
+                        removed = True
+                        continue
+                    dst.write(line)
+            if removed:
+                os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def open_history_store(base_dir):
+    """Store next to history.log, importing the existing log the first time."""
+    store = HistoryStore(os.path.join(base_dir, HISTORY_DB))
+    try:
+        count = store.import_log(os.path.join(base_dir, HISTORY_LOG))
+        if count:
+            print(f"[History] Imported {count} entries from {HISTORY_LOG} into {HISTORY_DB}")
+    except Exception as e:
+        print(f"[WARN] History import failed: {e}")
+    return store
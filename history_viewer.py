@@ -1,47 +1,74 @@
-import json
 import os
+import argparse
+import history_journal
+from history_store import open_history_store
 
-LOG_FILE = "history.log"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_FILE = os.path.join(BASE_DIR, history_journal.LOG_FILE)
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def view_history():
-    if not os.path.exists(LOG_FILE):
-        print("\n[!] No history log found yet.")
-        return
+def print_entry(entry):
+    entry_id = f"#{entry['id']} " if 'id' in entry else ""
+    print(f"\n{entry_id}[{entry.get('timestamp', '')}] ({entry.get('profile', '')})")
+    print(f"Input:  {entry.get('raw_text', '')}")
+    print(f"Output: {entry.get('refined_text', '')}")
+    print("-" * 60)
 
+def view_history(limit=10, since=None, profile=None, model=None, grep=None, search=None):
+    """Newest entries first. Reads the journal (history.log + rotated backups) backwards, so only
+    what is shown is ever loaded; `search` uses the full-text index in history.db instead."""
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            
-        if not lines:
-            print("\n[!] History log is empty.")
-            return
+        if search:
+            entries, _ = open_history_store(BASE_DIR).page(limit, query=search, profile=profile, model=model, since=since)
+        else:
+            if not history_journal.journal_files(LOG_FILE):
+                print("\n[!] No history log found yet.")
+                return
+            entries = history_journal.recent_entries(LOG_FILE, limit, since, profile, model, grep)
 
         clear_screen()
         print("="*60)
-        print(f"   📜 HANDY-GROQ HISTORY ({len(lines)} entries)")
+        print("   📜 HANDY-GROQ HISTORY")
         print("="*60)
-        
-        # Show last 10 entries by default, reverse order
-        for i, line in enumerate(reversed(lines)):
-            if i >= 10: break
-            try:
-                entry = json.loads(line)
-                print(f"\n[{entry['timestamp']}] ({entry['profile']})")
-                print(f"Input:  {entry.get('raw_text', '')}")
-                print(f"Output: {entry.get('refined_text', '')}")
-                print("-" * 60)
-            except json.JSONDecodeError:
-                # Handle lagacy plain text logs if any
-                print(f"\n[RAW]: {line.strip()}")
-                print("-" * 60)
-        
-        print("\n(Showing last 10 entries)")
-            
+
+        filters = (("search", search), ("grep", grep), ("since", since), ("profile", profile), ("model", model))
+        active = ", ".join(f"{k}: {v}" for k, v in filters if v)
+        if active:
+            print(f"   Filter: {active}")
+
+        for entry in entries:
+            print_entry(entry)
+
+        if not entries:
+            print("\n[!] No matching entries.")
+        print(f"\n(Showing last {len(entries)} entries)")
+
     except Exception as e:
         print(f"\n[ERROR] Could not read history: {e}")
 
+def follow_history(since=None, profile=None, model=None, grep=None):
+    """Print new entries as they are logged (Ctrl+C to stop)."""
+    matches = history_journal.entry_filter(since, profile, model, grep)
+    print(f"Following {LOG_FILE} (Ctrl+C to stop)...")
+    try:
+        for entry in history_journal.follow(LOG_FILE):
+            if matches(entry):
+                print_entry(entry)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
 if __name__ == "__main__":
-    view_history()
+    parser = argparse.ArgumentParser(description="Show recent transcriptions")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--since", help="only entries at or after this timestamp, e.g. 2025-01-31")
+    parser.add_argument("--profile")
+    parser.add_argument("--model", help="STT or refinement model")
+    parser.add_argument("--grep", help="case-insensitive regex over raw and refined text")
+    parser.add_argument("--search", help="full-text search via history.db")
+    parser.add_argument("--follow", action="store_true", help="after listing, keep printing new entries")
+    args = parser.parse_args()
+    view_history(args.limit, args.since, args.profile, args.model, args.grep, args.search)
+    if args.follow:
+        follow_history(args.since, args.profile, args.model, args.grep)
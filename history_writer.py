@@ -0,0 +1,178 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+
+from history_journal import BACKUP_COUNT
+from history_store import entry_line, new_uid
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+MAX_BYTES = 5 * 1024 * 1024
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` shared by every process that uses the same lock file."""
+    with open(path, "a+b") as f:
+        if msvcrt:
+            # Lock byte 0; LK_NBLCK fails immediately instead of msvcrt's fixed 10s wait
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+class HistoryWriter:
+    """Single writer for history.log (and history.db) used by both the desktop app and the web server.
+
+    `write()` only queues the entry; a background thread appends queued entries
+    in batches. Each batch is written under a lock file (`history.log.lock`), and
+    size-based rotation (history.log -> .1 -> .2) happens inside the same lock, so
+    two processes never append to a file the other is renaming. `close()` (also
+    registered with atexit) flushes whatever is still queued.
+    """
+
+    def __init__(self, log_file, store=None, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 batch_size=100, flush_interval=0.2):
+        self.log_file = os.path.abspath(log_file)
+        self.lock_file = self.log_file + ".lock"
+        self.store = store
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, config, log_file, store=None):
+        return cls(
+            log_file, store,
+            max_bytes=int(config.get('history_max_mb', 5) * 1024 * 1024),
+            batch_size=config.get('history_batch_size', 100),
+            flush_interval=config.get('history_flush_ms', 200) / 1000
+        )
+
+    def write(self, entry):
+        """Queue an entry (a dict, serialised now so later mutation cannot change it).
+
+        The entry gets its `uid` here, so the caller can hand it out (e.g. for a delete) before it is written.
+        """
+        entry.setdefault("uid", new_uid())
+        item = (entry, entry_line(entry))
+        if self.closed:
+            self._write_batch([item])
+        else:
+            self.queue.put(item)
+
+    def flush(self, timeout=None):
+        """Block until everything queued before this call is written."""
+        if self.closed:
+            return True
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        """Flush pending entries and stop the writer thread. Safe to call more than once."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    @contextmanager
+    def locked(self):
+        """Hold the journal lock, e.g. to rewrite history.log without racing appends or rotation."""
+        with file_lock(self.lock_file):
+            yield
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                # Close and flush requests are answered as soon as what precedes them is written
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                # Entries queued after close() started still get written
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        return
+                    if isinstance(item, threading.Event):
+                        item.set()
+                    elif item is not None:
+                        self._write_batch([item])
+
+    def _write_batch(self, batch):
+        data = "".join(line + "\n" for _, line in batch).encode("utf-8")
+        try:
+            with file_lock(self.lock_file):
+                self._rotate_if_needed(len(data))
+                with open(self.log_file, "ab") as f:
+                    f.write(data)
+        except Exception as e:
+            print(f"[WARN] History write failed ({len(batch)} entries): {e}")
+            return
+        if self.store is not None:
+            try:
+                self.store.add_many([entry for entry, _ in batch], [line for _, line in batch])
+            except Exception as e:
+                print(f"[WARN] History index failed: {e}")
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            size = os.path.getsize(self.log_file)
+        except FileNotFoundError:
+            return
+        if not self.max_bytes or not self.backup_count or not size or size + incoming <= self.max_bytes:
+            return
+        try:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.log_file}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.log_file}.{i + 1}")
+            os.replace(self.log_file, f"{self.log_file}.1")
+        except PermissionError as e:
+            # Windows: another program (e.g. a viewer) holds the file open; rotate on a later batch
+            print(f"[WARN] History rotation postponed: {e}")
@@ -0,0 +1,126 @@
+import time
+import threading
+from collections import deque
+
+# pynput reports numpad digits as raw virtual-key codes
+NUMPAD_KEYS = {f"<{96 + i}>": str(i) for i in range(10)}
+# Generic modifiers are matched as their left-hand variants
+MODIFIER_ALIASES = {'ctrl': 'ctrl_l', 'alt': 'alt_l', 'shift': 'shift_l'}
+# AltGr is reported on its own but is Ctrl + Alt for chord purposes
+ALT_GR_KEYS = ('ctrl_l', 'alt_l')
+SAFE_EXIT_CHORD = frozenset(('ctrl_l', 'alt_l', '0'))
+
+_names = {}
+_NAMES_MAX = 512
+
+def _resolve_key_name(key):
+    if getattr(key, 'name', None):
+        return MODIFIER_ALIASES.get(key.name, key.name)
+    if getattr(key, 'char', None):
+        return key.char.lower()
+    s = str(key).lower().strip("'").strip('"')
+    if 'key.' in s:
+        s = s.replace('key.', '').strip()
+    return NUMPAD_KEYS.get(s, s)
+
+def key_name(key):
+    """Unified key naming for both special keys and character keys (memoised per key)."""
+    try:
+        return _names[key]
+    except KeyError:
+        pass
+    except TypeError:  # unhashable stand-ins
+        return _resolve_key_name(key)
+    try:
+        name = _resolve_key_name(key)
+    except Exception:
+        return str(key).lower()
+    if len(_names) >= _NAMES_MAX:
+        _names.clear()
+    _names[key] = name
+    return name
+
+def expand_key(name):
+    """Names a physical key adds to (or removes from) the held set."""
+    return (name,) + ALT_GR_KEYS if name == 'alt_gr' else (name,)
+
+class HotkeyMatcher:
+    """Profile chords as frozensets, indexed by key name.
+
+    A chord can only become complete when one of its own keys goes down, so a
+    key press checks just the profiles that use that key, in config order.
+    """
+
+    def __init__(self, profiles):
+        self.chords = [(frozenset(p['key_names']), p) for p in profiles]
+        self.by_key = {}
+        for order, (chord, profile) in enumerate(self.chords):
+            for name in chord:
+                self.by_key.setdefault(name, []).append(order)
+
+    def match(self, held, pressed):
+        """First profile whose chord is fully held, considering only chords containing a `pressed` key."""
+        candidates = sorted({i for name in pressed for i in self.by_key.get(name, ())})
+        for i in candidates:
+            chord, profile = self.chords[i]
+            if chord <= held:
+                return profile
+        return None
+
+class HookWatchdog:
+    """Times keyboard hook callbacks and warns when one exceeds `budget_ms`.
+
+    The OS drops or delays a low-level hook that answers slowly, which lags
+    typing system-wide, so the callbacks must only do bookkeeping. Warnings are
+    printed at most once per `warn_interval` seconds; `summary()` reports the
+    recent durations.
+    """
+
+    def __init__(self, budget_ms=5.0, window=500, warn_interval=10.0):
+        self.budget_ms = budget_ms
+        self.warn_interval = warn_interval
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.over_budget = 0
+        self.last_warning = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, name, ms):
+        with self.lock:
+            self.samples.append(ms)
+            self.calls += 1
+            if ms <= self.budget_ms:
+                return
+            self.over_budget += 1
+            now = time.monotonic()
+            if now - self.last_warning < self.warn_interval:
+                return
+            self.last_warning = now
+        print(f"\n[WARN] Keyboard hook {name} took {ms:.1f} ms (budget {self.budget_ms:g} ms, "
+              f"{self.over_budget} of {self.calls} over)")
+
+    def measure(self, name):
+        return _Measure(self, name)
+
+    def summary(self):
+        with self.lock:
+            samples = sorted(self.samples)
+            calls, over = self.calls, self.over_budget
+        if not samples:
+            return {"calls": 0}
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return {"calls": calls, "p95_ms": round(p95, 2), "max_ms": round(samples[-1], 2), "over_budget": over}
+
+class _Measure:
+    __slots__ = ("watchdog", "name", "start")
+
+    def __init__(self, watchdog, name):
+        self.watchdog = watchdog
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.watchdog.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
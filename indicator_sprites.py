@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+# Label image placed in the indicator pill
+SPRITE_SIZE = (170, 34)
+EMOJI_FONT, EMOJI_SIZE = "seguiemj.ttf", 16
+TEXT_FONT, TEXT_SIZE = "seguisb.ttf", 12
+TEXT_X = 25
+# Queue depths shown as "Processing (n)..." that are rendered ahead of time
+PRERENDER_QUEUE_DEPTHS = range(2, 5)
+
+STATES = {
+    "recording": ("🎙", "Listening", "#ff4444"),
+    "processing": ("🤖", "Processing...", "#ffbb00"),
+    "typing": ("✅", "Done...", "#00cc00")
+}
+
+def state_label(state, profile_name=None, queue_depth=0):
+    """(emoji, text, color) shown for a state."""
+    emoji, text, color = STATES.get(state, ("?", "...", "white"))
+    if state == "recording" and profile_name:
+        formatted_profile = profile_name.strip().capitalize()
+        if formatted_profile != "Listening":
+            text = f"Listening ({formatted_profile})"
+        else:
+            text = "Listening..."
+    elif state == "processing" and queue_depth > 1:
+        text = f"Processing ({queue_depth})..."
+    return emoji, text, color
+
+def all_labels(profile_names):
+    """Every label the indicator can show for these profiles (plus a few queue depths)."""
+    labels = [state_label("recording", name) for name in profile_names]
+    labels += [state_label(state) for state in STATES]
+    labels += [state_label("processing", queue_depth=n) for n in PRERENDER_QUEUE_DEPTHS]
+    return list(dict.fromkeys(labels))
+
+class SpriteRenderer:
+    """Draws indicator labels as RGBA images at their final size. Fonts are loaded once.
+
+    Pure PIL, so it is safe to use off the Tk thread; turning an image into a
+    `PhotoImage` still has to happen on the Tk thread.
+    """
+
+    def __init__(self):
+        self.fonts = None
+        self.lock = threading.Lock()
+
+    def _load_fonts(self):
+        with self.lock:
+            if self.fonts is None:
+                try:
+                    self.fonts = (ImageFont.truetype(EMOJI_FONT, EMOJI_SIZE), ImageFont.truetype(TEXT_FONT, TEXT_SIZE))
+                except OSError:
+                    default = ImageFont.load_default()
+                    self.fonts = (default, default)
+            return self.fonts
+
+    def render(self, emoji, text, color):
+        emoji_font, text_font = self._load_fonts()
+        img = Image.new('RGBA', SPRITE_SIZE, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        middle = SPRITE_SIZE[1] // 2
+        draw.text((4, middle), emoji, font=emoji_font, fill=color, anchor="lm", embedded_color=True)
+        draw.text((TEXT_X, middle), text, font=text_font, fill=color, anchor="lm")
+        return img
+
+class SpriteCache:
+    """Bounded LRU of ready-to-show sprites keyed by the label text."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.items = OrderedDict()
+
+    def get(self, key):
+        sprite = self.items.get(key)
+        if sprite is not None:
+            self.items.move_to_end(key)
+        return sprite
+
+    def put(self, key, sprite):
+        self.items[key] = sprite
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_entries:
+            self.items.popitem(last=False)
+
+    def replace(self, sprites):
+        """Swap in a freshly rendered set (e.g. after the profiles changed)."""
+        self.items = OrderedDict(sprites)
+        while len(self.items) > self.max_entries:
+            self.items.popitem(last=False)
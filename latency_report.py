@@ -0,0 +1,86 @@
+import argparse
+import math
+from history_journal import LOG_FILE, iter_entries
+
+# Stages in pipeline order; anything else found in the log is listed after these
+STAGE_ORDER = ["capture", "upload", "queue", "vad", "encode", "stt", "stt_wait",
+               "refine", "first_token", "first_paste", "paste", "ordering", "total"]
+# Which model a stage's latency depends on
+STT_STAGES = {"encode", "stt", "stt_wait"}
+REFINE_STAGES = {"refine", "first_token", "first_paste"}
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def load_entries(log_file=LOG_FILE):
+    """All JSON entries from the log and its rotated backups, oldest first."""
+    return list(iter_entries(log_file))
+
+def stage_key(stage):
+    return (STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER), stage)
+
+def collect(entries, group_fn):
+    """{(group, stage): [ms, ...]} for every entry that has timings."""
+    samples = {}
+    for entry in entries:
+        for stage, ms in (entry.get("timings_ms") or {}).items():
+            group = group_fn(entry, stage)
+            if group is None or not isinstance(ms, (int, float)):
+                continue
+            samples.setdefault((group, stage), []).append(ms)
+    return samples
+
+def by_model(entry, stage):
+    if stage in STT_STAGES: return entry.get("stt_model")
+    if stage in REFINE_STAGES: return entry.get("refinement_model")
+    return None
+
+def print_table(title, samples, show_group=True):
+    header = f"{'Stage':<12} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    if show_group: header = f"{'':<24}" + header
+    print(f"\n{title}")
+    print("-" * len(header))
+    print(header)
+    for (group, stage) in sorted(samples, key=lambda k: (str(k[0]), stage_key(k[1]))):
+        values = sorted(samples[(group, stage)])
+        row = (f"{stage:<12} {len(values):>6} {percentile(values, 50):>9.0f} {percentile(values, 95):>9.0f} "
+               f"{percentile(values, 99):>9.0f} {values[-1]:>9.0f}")
+        if show_group: row = f"{str(group)[:23]:<24}" + row
+        print(row)
+
+def report(log_file=LOG_FILE, last=None, since=None, groups=("stage", "profile", "model")):
+    entries = [e for e in load_entries(log_file) if e.get("timings_ms")]
+    if since:
+        entries = [e for e in entries if e.get("timestamp", "") >= since]
+    if last:
+        entries = entries[-last:]
+    if not entries:
+        print("\n[!] No timed entries in the history log yet.")
+        return
+
+    print("=" * 72)
+    print(f"   ⏱️  HANDY-GROQ LATENCY REPORT ({len(entries)} dictations, ms)")
+    print("=" * 72)
+    seconds = sorted(e["audio_seconds"] for e in entries if isinstance(e.get("audio_seconds"), (int, float)))
+    sizes = sorted(e["audio_bytes"] for e in entries if isinstance(e.get("audio_bytes"), (int, float)))
+    if seconds: print(f"Audio length : p50 {percentile(seconds, 50):.1f} s, p95 {percentile(seconds, 95):.1f} s")
+    if sizes: print(f"Upload size  : p50 {percentile(sizes, 50)/1024:.1f} KB, p95 {percentile(sizes, 95)/1024:.1f} KB")
+
+    if "stage" in groups:
+        print_table("By stage", collect(entries, lambda e, s: ""), show_group=False)
+    if "profile" in groups:
+        print_table("By profile", collect(entries, lambda e, s: e.get("profile", "?")))
+    if "model" in groups:
+        print_table("By model", collect(entries, by_model))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency percentiles per stage, profile and model from history.log")
+    parser.add_argument("--file", default=LOG_FILE, help="history log (rotated .1/.2 backups are read too)")
+    parser.add_argument("--last", type=int, help="only the most recent N dictations")
+    parser.add_argument("--since", help="only entries at or after this timestamp, e.g. 2025-01-31")
+    parser.add_argument("--by", nargs="+", choices=["stage", "profile", "model"],
+                        default=["stage", "profile", "model"], help="tables to print")
+    args = parser.parse_args()
+    report(args.file, args.last, args.since, args.by)
@@ -1,19 +1,18 @@
 import os
 import sys
 import time
-import queue
 import threading
+from stage_timer import StageTimer, StartupProfile
+# Startup phases are always recorded (cheap); --startup-profile prints them
+startup = StartupProfile()
+
+import copy
 import json
+import functools
+import re
 import math
-import numpy as np
-import sounddevice as sd
-from groq import Groq
+import importlib.util
 from dotenv import load_dotenv
-from pynput import keyboard
-import scipy.io.wavfile as wavfile
-from PIL import Image, ImageDraw, ImageFont, ImageTk
-import logging
-from logging.handlers import RotatingFileHandler
 
 try:
     import ctypes
@@ -35,8 +34,20 @@ except ImportError:
 import pyperclip
 import winsound
 from datetime import datetime
-import pystray
-import settings_manager
+from concurrent.futures import ThreadPoolExecutor
+from hotkeys import key_name, expand_key, HotkeyMatcher, HookWatchdog, SAFE_EXIT_CHORD
+from segment_streamer import SegmentStreamer
+import audio_processing
+from audio_capture import AudioCapture
+from dictation_pipeline import DictationJob, OrderedPipeline
+from response_cache import open_refinement_cache, refinement_key
+from config_store import ConfigStore
+from history_store import open_history_store, HISTORY_LOG
+from history_writer import HistoryWriter
+# Heavier dependencies are imported where they are first needed, off the startup path:
+# groq/httpx, soundfile and faster-whisper on the control thread (_init_services), pynput when
+# the listener starts, sounddevice on the first microphone access, PIL and pystray on the
+# sprite and tray threads
 
 # Load environment variables
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -44,14 +55,22 @@ os.chdir(BASE_DIR)
 load_dotenv()
 
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+startup.mark("imports")
+
+# Streaming refinement is pasted in sentence-sized pieces
+SENTENCE_END = re.compile(r'[.!?…:;](?:["\')\]]*)\s+|\n+')
+# Let the target window read the clipboard before it is overwritten by the next piece
+STREAM_PASTE_SETTLE_SECONDS = 0.05
+# Settings only read at startup; everything else (profiles, hotkeys, models...) applies live
+RESTART_KEYS = {
+    'connection_keepalive_seconds', 'rate_limits', 'rate_limit_retries', 'rate_limit_wait_seconds',
+    'rate_limit_max_delay_seconds', 'rate_limit_max_wait_seconds', 'circuit_breaker_threshold',
+    'circuit_breaker_cooldown_seconds', 'refinement_cache_enabled', 'refinement_cache_max_entries',
+    'refinement_cache_ttl_hours', 'warm_mic_enabled', 'warm_mic_preroll_ms', 'warm_mic_idle_seconds',
+    'pipeline_workers', 'pipeline_max_pending', 'config_watch_seconds', 'history_max_mb',
+    'history_batch_size', 'history_flush_ms', 'hook_budget_ms'
+}
 
-# Configure Logging
-log_formatter = logging.Formatter('%(message)s')
-log_handler = RotatingFileHandler("history.log", maxBytes=5*1024*1024, backupCount=2, encoding='utf-8')
-log_handler.setFormatter(log_formatter)
-logger = logging.getLogger("HandyGroq")
-logger.setLevel(logging.INFO)
-logger.addHandler(log_handler)
 
 class RecordingIndicator:
     def __init__(self):
@@ -62,7 +81,10 @@ class RecordingIndicator:
         self.state = "idle"
         self.animation_id = None
         self.dot_pulse = 0
-        self.emoji_cache = {}
+        self.queue_depth = 0
+        # Label sprites: drawn off the Tk thread, shown by swapping the label's image
+        self.renderer = None
+        self.sprites = None
         
         if TK_AVAILABLE:
             try:
@@ -79,6 +101,38 @@ class RecordingIndicator:
         else:
             print("[INFO] Tkinter not found. Visual indicator disabled.")
 
+    def _renderer(self):
+        if self.renderer is None:
+            from indicator_sprites import SpriteRenderer
+            self.renderer = SpriteRenderer()
+        return self.renderer
+
+    def _sprite_cache(self):
+        if self.sprites is None:
+            from indicator_sprites import SpriteCache
+            self.sprites = SpriteCache()
+        return self.sprites
+
+    def prerender(self, profile_names):
+        """Render every label for these profiles on a background thread, then swap the whole set in."""
+        if not self.root: return
+        def render():
+            try:
+                with startup.phase("indicator sprites"):
+                    from indicator_sprites import all_labels
+                    images = {f"{emoji} {text}": self._renderer().render(emoji, text, color)
+                              for emoji, text, color in all_labels(profile_names)}
+            except Exception as e:
+                print(f"[WARN] Indicator pre-render failed: {e}")
+                return
+            self._thread_safe(self._install_sprites, images)
+        threading.Thread(target=render, name="indicator-sprites", daemon=True).start()
+
+    def _install_sprites(self, images):
+        # PhotoImages belong to the Tk thread
+        from PIL import ImageTk
+        self._sprite_cache().replace((key, ImageTk.PhotoImage(img)) for key, img in images.items())
+
     def _thread_safe(self, func, *args, **kwargs):
         """Marshal UI calls to the main thread."""
         if self.root:
@@ -111,6 +165,14 @@ class RecordingIndicator:
     def update_text(self, text, state=None):
         self._thread_safe(self._update_text_impl, text, state)
 
+    def set_queue_depth(self, depth):
+        self._thread_safe(self._set_queue_depth_impl, depth)
+
+    def _set_queue_depth_impl(self, depth):
+        self.queue_depth = depth
+        if self.visible and self.state == "processing":
+            self._update_state("processing")
+
     def _update_text_impl(self, text, state):
         if state:
             self._update_state(state, text)
@@ -163,41 +225,20 @@ class RecordingIndicator:
         self.state = state
         if not getattr(self, 'canvas', None): return
         
-        states = {
-            "recording": ("🎙", "Listening", "#ff4444"),
-            "processing": ("🤖", "Processing...", "#ffbb00"),
-            "typing": ("✅", "Done...", "#00cc00")
-        }
-        emoji, text, color = states.get(state, ("?", "...", "white"))
-        
-        if state == "recording" and profile_name:
-            formatted_profile = profile_name.strip().capitalize()
-            if formatted_profile != "Listening":
-                text = f"Listening ({formatted_profile})"
-            else:
-                text = "Listening..."
+        from indicator_sprites import state_label
+        emoji, text, color = state_label(state, profile_name, self.queue_depth)
 
         try:
             full_text = f"{emoji} {text}"
-            if full_text not in self.emoji_cache:
-                img_w, img_h = 600, 100
-                img = Image.new('RGBA', (img_w, img_h), (0, 0, 0, 0))
-                draw = ImageDraw.Draw(img)
-                try: 
-                    emoji_font = ImageFont.truetype("seguiemj.ttf", 48)
-                    text_font = ImageFont.truetype("seguisb.ttf", 40)
-                except: 
-                    emoji_font = text_font = ImageFont.load_default()
-                
-                draw.text((15, img_h//2), emoji, font=emoji_font, fill=color, anchor="lm", embedded_color=True)
-                draw.text((90, img_h//2), text, font=text_font, fill=color, anchor="lm")
-                
-                img = img.resize((170, 34), Image.Resampling.LANCZOS)
-                self.emoji_cache[full_text] = ImageTk.PhotoImage(img)
-            
+            sprite = self._sprite_cache().get(full_text)
+            if sprite is None:
+                # Not pre-rendered (e.g. a deep queue); fonts are already loaded, so this stays cheap
+                from PIL import ImageTk
+                sprite = ImageTk.PhotoImage(self._renderer().render(emoji, text, color))
+                self.sprites.put(full_text, sprite)
             if hasattr(self, 'label'):
-                self.label.config(image=self.emoji_cache[full_text])
-                self.label.image = self.emoji_cache[full_text]
+                self.label.config(image=sprite)
+                self.label.image = sprite
         except Exception as e:
             if hasattr(self, 'label'):
                 self.label.config(text=f"{emoji} {text}", fg=color, image='')
@@ -231,9 +272,14 @@ class SystemTray:
         self.app = app
         self.icon = None
         self.running = False
+        self.ready = threading.Event()
 
     def run(self):
         self.running = True
+        with startup.phase("system tray"):
+            import pystray
+            import settings_manager
+            from PIL import Image
         icon_path = os.path.join(ASSETS_DIR, "main.png")
         try:
             image = Image.open(icon_path)
@@ -248,6 +294,7 @@ class SystemTray:
             pystray.MenuItem("Exit", self.exit_app)
         )
         self.icon = pystray.Icon("HandyGroqSTT", image, "Handy Groq STT", menu)
+        self.ready.set()
         self.icon.run()
 
     def toggle_refinement(self, icon, item):
@@ -259,6 +306,7 @@ class SystemTray:
         self.app.save_config()
 
     def toggle_autostart(self, icon, item):
+        import settings_manager
         current = settings_manager.is_autostart_enabled()
         settings_manager.set_autostart(not current)
 
@@ -285,48 +333,130 @@ class SystemTray:
 class GroqSTT:
     def __init__(self, indicator):
         self.indicator = indicator
+        self.config_store = ConfigStore(os.path.join(BASE_DIR, "config.json"))
         self.load_config()
+        # Edits from the web UI, settings manager or an editor apply without a restart
+        self.config_store.subscribe(self.on_config_change)
         self.api_key = os.getenv("GROQ_API_KEY")
         if not self.api_key:
             print("\n[!] ERROR: GROQ_API_KEY not found in .env file.")
             exit(1)
         
-        self.client = Groq(api_key=self.api_key)
+        # API client, engines, caches and history are built by _init_services on the control thread
+        self.client = self.warmer = self.limiter = self.stt_engines = None
+        self.refinement_cache = self.history = self.history_writer = None
+        self.services_ready = threading.Event()
+        self.startup_error = None
         self.sample_rate = 16000
         self.channels = 1
         self.recording = False
-        self.audio_queue = queue.Queue()
-        self.audio_data = []
-        self.keyboard_controller = keyboard.Controller()
-        
-        self.check_microphone()
+        self.capture = AudioCapture(
+            self.sample_rate, self.channels,
+            warm=self.config.get('warm_mic_enabled', False),
+            preroll_ms=self.config.get('warm_mic_preroll_ms', 300),
+            idle_seconds=self.config.get('warm_mic_idle_seconds', 300)
+        )
+        self.streamer = None
+        self.pump_thread = None
+        self.timer = None
+        self.keyboard_controller = None
+        self.listener = None
+        self.tray = None
+
         self.current_keys = set()
         self.active_profile = None
-        
-        # Initialize listener but don't start yet
-        self.listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
-        
+        # Profile whose chord is held, tracked on the hook thread; recording itself starts on the control thread
+        self.held_profile = None
+        # The keyboard hook only does bookkeeping; starting/stopping the mic, sounds and the
+        # indicator run here, one at a time and in hotkey order
+        self.control = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hotkey-control")
+        self.hook_watchdog = HookWatchdog(self.config.get('hook_budget_ms', 5))
+        # First control job, so a hotkey pressed during startup simply waits for it
+        self.control.submit(self._init_services)
+        # Indicator labels for every profile are drawn now, not on the first hotkey press
+        self.indicator.prerender([p['name'] for p in self.config['profiles']])
+
+        # Bounded, ordered processing: transcription/refinement run on a worker pool,
+        # output is delivered to perform_action in capture order
+        self.pipeline = OrderedPipeline(
+            self.process_job, self.deliver_job,
+            workers=self.config.get('pipeline_workers', 2),
+            max_pending=self.config.get('pipeline_max_pending', 4),
+            on_depth_change=self.indicator.set_queue_depth
+        )
+
         self._print_banner()
 
+    def _init_services(self):
+        """Control thread, first job: everything the keyboard listener does not need to start."""
+        try:
+            with startup.phase("import groq"):
+                from groq_client import create_client, ConnectionWarmer
+                from rate_limiter import RateLimiter
+            with startup.phase("api client"):
+                keepalive = self.config.get('connection_keepalive_seconds', 120)
+                self.client = create_client(self.api_key, keepalive)
+                self.warmer = ConnectionWarmer(self.client, keepalive)
+                self.limiter = RateLimiter.from_config(self.config)
+            with startup.phase("stt engines"):
+                from stt_engines import STTEngines
+                # Groq, local CPU model ("local:..." models) or Groq with local fallback when it is slow
+                self.stt_engines = STTEngines(self.client, self.groq_request_with_retry,
+                                              log=lambda msg: print(f" [{msg}]", end="", flush=True), log_encoding=True)
+                self.stt_engines.preload(self.config)
+            with startup.phase("cache + history"):
+                self.refinement_cache = open_refinement_cache(self.config, BASE_DIR)
+                # Searchable history shared with the web UI; history.log stays the append-only journal
+                self.history = open_history_store(BASE_DIR)
+                # Entries are written in batches off the processing thread, coordinated with the web server
+                self.history_writer = HistoryWriter.from_config(self.config, os.path.join(BASE_DIR, HISTORY_LOG), self.history)
+            with startup.phase("microphone"):
+                self.check_microphone()
+                # Keep the mic open with a pre-roll buffer if warm mode is enabled
+                try:
+                    self.capture.warm_up()
+                except Exception as e:
+                    print(f"[!] Warm mic unavailable, opening on demand: {e}")
+        except Exception as e:
+            print(f"\n[!] ERROR: Startup failed: {e}")
+            self.startup_error = str(e) or type(e).__name__
+        finally:
+            self.services_ready.set()
+
     def start(self):
         """Starts background threads (Listener, Tray)."""
         # Start Keyboard Listener (non-blocking mode)
-        self.listener.start()
-        
+        with startup.phase("keyboard listener"):
+            from pynput import keyboard
+            if self.keyboard_controller is None:
+                self.keyboard_controller = keyboard.Controller()
+            self.listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
+            self.listener.start()
+        self.config_store.watch(self.config.get('config_watch_seconds', 1.0))
+
         # Start System Tray (in background thread)
         self.tray = SystemTray(self)
-        self.tray_thread = threading.Thread(target=self.tray.run, daemon=True)
+        self.tray_thread = threading.Thread(target=self.tray.run, name="tray", daemon=True)
         self.tray_thread.start()
 
     def save_config(self):
-        with open("config.json", "w") as f:
-            json.dump(self.config, f, indent=4)
+        config = copy.deepcopy(self.config)
+        for profile in config['profiles']:
+            profile.pop('key_names', None)
+        self.config_store.save(config)
 
     def stop_app(self):
         print("\nStopping application...")
         self.indicator.hide()
         if self.recording:
             self.stop_recording()
+        self.capture.close()
+        hook = self.hook_watchdog.summary()
+        if hook.get('over_budget'):
+            print(f"[Hotkeys] {hook['over_budget']} of {hook['calls']} hook callbacks over budget (max {hook['max_ms']} ms)")
+        # os._exit skips atexit, so write out queued history entries first
+        if self.history_writer: self.history_writer.close()
+        if self.refinement_cache: self.refinement_cache.close()
         # Force exit to kill all threads including mainloop
         os._exit(0)
 
@@ -335,8 +465,13 @@ class GroqSTT:
         print("   🎙️  GROQ ULTIMATE SPEECH-TO-TEXT")
         print("="*50)
         print(f"  STT Model   : {self.config['stt_model']}")
+        # find_spec only locates faster-whisper; importing it is left to the control thread
+        if importlib.util.find_spec("faster_whisper") and self.config.get('stt_fallback_enabled', True):
+            print(f"  Offline STT : ✅ {self.config.get('local_stt_model', 'base.en')} (when Groq is slow)")
         print(f"  Refinement  : {'✅ Enabled' if self.config['refinement_enabled'] else '❌ Disabled'}")
         print(f"  Action Mode : {self.config.get('action_mode', 'type').upper()}")
+        print(f"  Streaming   : {'✅ Enabled' if self.config.get('streaming_enabled', False) else '❌ Disabled'}")
+        print(f"  Warm Mic    : {'✅ Enabled' if self.config.get('warm_mic_enabled', False) else '❌ Disabled'}")
         print("\n  🚀 READY! INSTRUCTIONS:")
         for p in self.config['profiles']:
             keys = " + ".join(p['hotkey']).upper()
@@ -347,13 +482,34 @@ class GroqSTT:
         print("=" * 50 + "\n")
 
     def load_config(self):
-        config_path = "config.json"
-        with open(config_path, "r") as f:
-            self.config = json.load(f)
-        
-        for profile in self.config['profiles']:
+        self.config = self._prepare_config(self.config_store.load())
+
+    def _prepare_config(self, config):
+        for profile in config['profiles']:
             profile['key_names'] = [k.lower().strip() for k in profile['hotkey']]
-        self.debug_keys = self.config.get("debug_keys", False)
+        self.debug_keys = config.get("debug_keys", False)
+        self.hotkeys = HotkeyMatcher(config['profiles'])
+        return config
+
+    def on_config_change(self, config):
+        """Swaps in a new config.json version. Dictations in flight keep their own snapshot."""
+        try:
+            config = self._prepare_config(copy.deepcopy(config))
+        except (KeyError, TypeError) as e:
+            print(f"\n[Config] Ignoring invalid config.json: {e}")
+            return
+        changed = sorted(k for k in set(config) | set(self.config) if config.get(k) != self.config.get(k))
+        if not changed:
+            return
+        self.config = config
+        print(f"\n[Config] Reloaded ({', '.join(changed)})")
+        if 'profiles' in changed:
+            self.indicator.prerender([p['name'] for p in config['profiles']])
+        if any(k in changed for k in ('stt_model', 'local_stt_model', 'stt_fallback_enabled')):
+            self.control.submit(lambda: self.stt_engines and self.stt_engines.preload(config))
+        restart = [k for k in changed if k in RESTART_KEYS]
+        if restart:
+            print(f"[Config] Restart to apply: {', '.join(restart)}")
 
     def play_sound(self, sound_type):
         if not self.config.get('play_sounds', True):
@@ -368,6 +524,7 @@ class GroqSTT:
 
     def check_microphone(self):
         try:
+            import sounddevice as sd
             devices = sd.query_devices()
             input_devices = [d for d in devices if d['max_input_channels'] > 0]
             if not input_devices:
@@ -378,16 +535,11 @@ class GroqSTT:
             print(f"[!] ERROR: Audio query failed: {e}")
             return False
 
-    def _audio_callback(self, indata, frames, time, status):
-        if self.recording:
-            self.audio_queue.put(indata.copy())
-
     def start_recording(self):
         if self.recording:
             return
         try:
-            self.stream = sd.InputStream(callback=self._audio_callback, samplerate=self.sample_rate, channels=self.channels)
-            self.stream.start()
+            self.capture.start()
         except Exception as e:
             print(f"\n[!] Mic access failed: {e}")
             self.play_sound("error")
@@ -398,188 +550,377 @@ class GroqSTT:
 
         profile_name = self.active_profile['name'] if self.active_profile else "General"
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Listening ({profile_name})...", end="", flush=True)
+        self.timer = StageTimer()
+        if self.config.get('streaming_enabled', False):
+            self.streamer = SegmentStreamer(
+                functools.partial(self.transcribe_audio, model=self.config['stt_model'], timer=self.timer), self.sample_rate,
+                min_segment_seconds=self.config.get('streaming_min_segment_seconds', 4),
+                pause_ms=self.config.get('streaming_pause_ms', 500),
+                threshold_db=self.config.get('silence_threshold_db', -40),
+                prepare_fn=functools.partial(self.prepare_audio, config=dict(self.config), timer=self.timer)
+            )
         self.recording = True
+        # Get the HTTPS connection ready while the user is still talking
+        self.warmer.warm()
+        if self.streamer:
+            self.pump_thread = threading.Thread(target=self._pump_segments, args=(self.streamer,), daemon=True)
+            self.pump_thread.start()
         self.play_sound("start")
         self.indicator.show(f"{profile_name.upper()}", "recording")
-        self.audio_data = []
-        while not self.audio_queue.empty(): self.audio_queue.get()
+
+    def _pump_segments(self, streamer):
+        """Feeds newly captured frames (zero-copy views) into the segment streamer while the hotkey is held."""
+        buffer = self.capture.buffer
+        while self.recording:
+            time.sleep(0.1)
+            frames = buffer.frames
+            if frames > streamer.frames_fed:
+                streamer.feed(buffer.view(streamer.frames_fed, frames))
 
     def stop_recording(self):
         if not self.recording: return None
         self.recording = False
         self.play_sound("stop")
         self.indicator.update_text("PROCESSING...", "processing")
-        self.stream.stop()
-        self.stream.close()
-        
-        while not self.audio_queue.empty(): self.audio_data.append(self.audio_queue.get())
-        if not self.audio_data:
+        audio = self.capture.stop()
+        if self.pump_thread:
+            self.pump_thread.join()
+            self.pump_thread = None
+        if self.streamer and audio is not None and len(audio) > self.streamer.frames_fed:
+            self.streamer.feed(audio[self.streamer.frames_fed:])
+
+        if audio is None:
             print(" No audio captured.")
+            if self.streamer:
+                self.streamer.cancel()
+                self.streamer = None
             self.indicator.hide()
             self.active_profile = None
             return None
-        return np.concatenate(self.audio_data)
+        return audio
+
+    def groq_request_with_retry(self, func, model, tokens=0):
+        """Runs an API call through the shared rate limiter (buckets, Retry-After backoff, circuit breaker)."""
+        result = self.limiter.call(func, model, tokens)
+        self.warmer.mark_used()
+        return result
+
+    def prepare_audio(self, audio, config=None, timer=None):
+        """Trims silence before upload. Returns (audio or None if no speech, stats)."""
+        config = config or self.config
+        if not config.get('vad_enabled', True):
+            seconds = round(len(audio) / self.sample_rate, 2)
+            return audio, {"audio_seconds": seconds, "trimmed_seconds": seconds}
+        start = time.perf_counter()
+        result = audio_processing.trim_silence(
+            audio, self.sample_rate,
+            threshold_db=config.get('silence_threshold_db', -40),
+            padding_ms=config.get('vad_padding_ms', 200),
+            max_pause_ms=config.get('vad_max_pause_ms', 700),
+            min_speech_ms=config.get('vad_min_speech_ms', 150)
+        )
+        if timer: timer.since("vad", start)
+        return result
 
-    def groq_request_with_retry(self, func, *args, **kwargs):
-        retries = self.config.get('rate_limit_retries', 3)
-        wait = self.config.get('rate_limit_wait_seconds', 2)
-        for i in range(retries):
-            try: return func(*args, **kwargs)
-            except Exception as e:
-                if "rate_limit" in str(e).lower() and i < retries - 1:
-                    print(f"\n[Rate Limit] Retrying in {wait}s...")
-                    time.sleep(wait); continue
-                raise e
-        return None
-
-    def transcribe_audio(self, audio_data):
-        temp_filename = "temp_recording.wav"
-        wavfile.write(temp_filename, self.sample_rate, (audio_data * 32767).astype(np.int16))
+    def transcribe_audio(self, audio_data, model=None, timer=None):
+        model = model or self.config['stt_model']
         try:
-            def call_stt():
-                 with open(temp_filename, "rb") as file:
-                    return self.client.audio.transcriptions.create(file=(temp_filename, file.read()), model=self.config['stt_model'])
-            trans = self.groq_request_with_retry(call_stt)
-            return trans.text.strip()
+            engine = self.stt_engines.get(model, self.config)
+            start = time.perf_counter()
+            text = engine.transcribe(audio_data, self.sample_rate, model, self.config, timer)
+            if timer: timer.since("stt", start)
+            return text
         except Exception as e: print(f" Transcription fail: {e}"); self.play_sound("error"); return None
-        finally:
-            if os.path.exists(temp_filename): os.remove(temp_filename)
 
-    def refine_text(self, text):
-        if not self.config['refinement_enabled']: return text
-        prompt = self.active_profile['prompt'] if self.active_profile else "Refine text."
+    def transcribe_long_audio(self, audio, config, timer=None):
+        """Long recordings go out as overlapping chunks in parallel; short ones as a single request."""
+        transcribe = functools.partial(self.transcribe_audio, model=config['stt_model'], timer=timer)
+        if not config.get('chunking_enabled', True):
+            return transcribe(audio)
+        import audio_chunking
+        text, chunks = audio_chunking.transcribe_chunks(
+            audio, self.sample_rate, transcribe,
+            chunk_seconds=config.get('chunk_seconds', 45),
+            overlap_ms=config.get('chunk_overlap_ms', 1000),
+            max_workers=config.get('chunk_workers', 4)
+        )
+        if chunks > 1:
+            print(f" [{chunks} chunks]", end="", flush=True)
+            if timer: timer.count("chunks", chunks)
+        return text
+
+    def _refinement_prompt(self, profile):
+        return profile['prompt'] if profile else "Refine text."
+
+    def _refinement_key(self, text, profile, config):
+        return refinement_key(config['refinement_model'], self._refinement_prompt(profile), text)
+
+    def refine_text(self, text, profile=None, config=None):
+        from rate_limiter import estimate_tokens
+        config = config or self.config
+        if not config['refinement_enabled']: return text
+        prompt = self._refinement_prompt(profile)
         try:
             def call_refinement():
                 return self.client.chat.completions.create(
-                    model=self.config['refinement_model'],
+                    model=config['refinement_model'],
                     messages=[{"role": "system", "content": prompt}, {"role": "user", "content": text}]
                 )
-            res = self.groq_request_with_retry(call_refinement)
-            return res.choices[0].message.content.strip()
+            def refine():
+                res = self.groq_request_with_retry(call_refinement, config['refinement_model'], estimate_tokens(prompt, text))
+                return res.choices[0].message.content.strip()
+            if not self.refinement_cache: return refine()
+            return self.refinement_cache.get_or_compute(self._refinement_key(text, profile, config), refine)
         except Exception as e: print(f" Refinement fail: {e}"); return text
 
-    def perform_action(self, text, raw_text):
-        if not text: return
-        mode = self.config.get('action_mode', 'type')
-        
-        # Always copy to clipboard first
+    def refine_text_stream(self, text, profile=None, config=None):
+        """Yields refinement text deltas as the completion is generated."""
+        from rate_limiter import estimate_tokens
+        config = config or self.config
+        prompt = self._refinement_prompt(profile)
+        def call_refinement():
+            return self.client.chat.completions.create(
+                model=config['refinement_model'],
+                messages=[{"role": "system", "content": prompt}, {"role": "user", "content": text}],
+                stream=True
+            )
+        for chunk in self.groq_request_with_retry(call_refinement, config['refinement_model'], estimate_tokens(prompt, text)):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta: yield delta
+
+    def should_stream_refinement(self, job):
+        if not job.config['refinement_enabled']: return False
+        if job.config.get('action_mode', 'type') not in ["type", "type_and_copy"]: return False
+        if job.profile and 'stream_refinement' in job.profile:
+            return bool(job.profile['stream_refinement'])
+        return job.config.get('refinement_streaming', False)
+
+    def _paste(self, text):
         pyperclip.copy(text)
-        
-        if mode in ["type", "type_and_copy"]:
+        self._press_paste()
+
+    def _press_paste(self):
+        from pynput import keyboard
+        with self.keyboard_controller.pressed(keyboard.Key.ctrl):
+            self.keyboard_controller.tap('v')
+
+    def _stream_and_paste(self, job):
+        """Pastes the refinement sentence by sentence while it streams. Returns the full text."""
+        key = self._refinement_key(job.raw_text, job.profile, job.config)
+        cached = self.refinement_cache.get(key) if self.refinement_cache else None
+        if cached is not None:
+            self._paste(cached)
+            return cached
+
+        parts, pending, failed = [], "", False
+        start, first_paste = time.perf_counter(), True
+        try:
+            for delta in self.refine_text_stream(job.raw_text, job.profile, job.config):
+                if not parts: delta = delta.lstrip()
+                if not delta: continue
+                parts.append(delta)
+                pending += delta
+                last_end = None
+                for last_end in SENTENCE_END.finditer(pending): pass
+                if last_end:
+                    if first_paste:
+                        job.timer.since("first_paste", start)
+                        first_paste = False
+                    self._paste(pending[:last_end.end()])
+                    pending = pending[last_end.end():]
+                    time.sleep(STREAM_PASTE_SETTLE_SECONDS)
+        except Exception as e:
+            print(f" Refinement fail: {e}")
+            failed = True
+            if not parts:
+                # Nothing pasted yet: fall back to the raw transcript like refine_text does
+                parts, pending = [job.raw_text], job.raw_text
+        pending = pending.rstrip()
+        if pending: self._paste(pending)
+        result = "".join(parts).strip()
+        if self.refinement_cache and not failed and result:
+            self.refinement_cache.put(key, result)
+        return result
+
+    def perform_action(self, job):
+        mode = job.config.get('action_mode', 'type')
+
+        if job.stream_refinement:
             self.indicator.update_text("Done", "typing")
             # Safety delay to ensure physically held keys are released
             time.sleep(0.3)
-            # Use Ctrl+V to paste (instant, atomic output)
-            with self.keyboard_controller.pressed(keyboard.Key.ctrl):
-                self.keyboard_controller.tap('v')
-        
-        self.log_to_file(raw_text, text)
+            with job.timer.stage("refine"):
+                job.refined_text = self._stream_and_paste(job)
+            # Clipboard ends up with the complete text, not the last piece
+            if job.refined_text: pyperclip.copy(job.refined_text)
+        else:
+            text = job.refined_text
+            if not text: return
+
+            # Always copy to clipboard first
+            pyperclip.copy(text)
+
+            if mode in ["type", "type_and_copy"]:
+                self.indicator.update_text("Done", "typing")
+                with job.timer.stage("paste"):
+                    # Safety delay to ensure physically held keys are released
+                    time.sleep(0.3)
+                    # Use Ctrl+V to paste (instant, atomic output)
+                    self._press_paste()
+
+        if not job.refined_text: return
+        self.log_to_file(job)
         self.play_sound("success")
 
-    def log_to_file(self, raw, refined):
+    def log_to_file(self, job):
         try:
             ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            prof = self.active_profile['name'] if self.active_profile else "General"
             log_entry = {
                 "timestamp": ts,
-                "profile": prof,
-                "raw_text": raw,
-                "refined_text": refined,
-                "stt_model": self.config['stt_model'],
-                "refinement_model": self.config['refinement_model']
+                "profile": job.profile_name,
+                "raw_text": job.raw_text,
+                "refined_text": job.refined_text,
+                "stt_model": job.config['stt_model'],
+                "refinement_model": job.config['refinement_model']
             }
-            # Logger is configured to write just the message (JSON)
-            logger.info(json.dumps(log_entry))
+            if job.stats: log_entry.update(job.stats)
+            # Stage timings in ms; "total" runs from hotkey release to the text being delivered
+            job.timer.since("total", job.released)
+            log_entry.update(job.timer.entry())
+            self.history_writer.write(log_entry)
         except Exception as e: print(f"Logging error: {e}")
 
-    def _get_key_name(self, key):
-        """Unified key naming for both special keys and character keys."""
-        try:
-            if hasattr(key, 'name') and key.name:
-                name = key.name
-                if name == 'ctrl': return 'ctrl_l'
-                if name == 'alt': return 'alt_l'
-                if name == 'shift': return 'shift_l'
-                return name
-            if hasattr(key, 'char') and key.char:
-                return key.char.lower()
-            
-            s = str(key).lower().strip("'" ).strip('"')
-            if 'key.' in s:
-                s = s.replace('key.', '').strip()
-            
-            numpad_map = {
-                '<96>': '0', '<97>': '1', '<98>': '2', '<99>': '3',
-                '<100>': '4', '<101>': '5', '<102>': '6', '<103>': '7',
-                '<104>': '8', '<105>': '9'
-            }
-            return numpad_map.get(s, s)
-        except Exception: return str(key).lower()
-
     def on_press(self, key):
-        name = self._get_key_name(key)
-        self.current_keys.add(name)
-        
-        if name == 'alt_gr':
-            self.current_keys.add('ctrl_l')
-            self.current_keys.add('alt_l')
-
-        # Safe Exit: Ctrl + Alt + 0
-        if all(k in self.current_keys for k in ['ctrl_l', 'alt_l', '0']):
-            print("\n[!] Safe Exit triggered. Cleaning up...")
-            if self.tray and self.tray.icon:
-                self.tray.icon.stop()
-            self.stop_app()
-
-        if not self.recording:
-            for profile in self.config['profiles']:
-                if all(kn in self.current_keys for kn in profile['key_names']):
-                    self.active_profile = profile
-                    self.start_recording()
-                    break
+        """Keyboard hook: update the held keys and hand any real work to the control thread."""
+        with self.hook_watchdog.measure("press"):
+            pressed = expand_key(key_name(key))
+            self.current_keys.update(pressed)
+
+            if SAFE_EXIT_CHORD <= self.current_keys:
+                self.control.submit(self._safe_exit)
+                return
+
+            if self.held_profile is None:
+                profile = self.hotkeys.match(self.current_keys, pressed)
+                if profile:
+                    self.held_profile = profile
+                    self.control.submit(self._begin_dictation, profile)
 
     def on_release(self, key):
-        name = self._get_key_name(key)
-        if name in self.current_keys:
-            self.current_keys.remove(name)
-        
-        if name == 'alt_gr':
-            if 'ctrl_l' in self.current_keys: self.current_keys.remove('ctrl_l')
-            if 'alt_l' in self.current_keys: self.current_keys.remove('alt_l')
-        
-        if self.recording and self.active_profile:
-            if name in self.active_profile['key_names']:
-                audio = self.stop_recording()
-                if audio is not None:
-                    threading.Thread(target=self.process_and_action, args=(audio,)).start()
-                else:
-                    self.active_profile = None
-
-    def process_and_action(self, audio):
-        raw_text = self.transcribe_audio(audio)
-        if raw_text:
-            print(f" \"{raw_text}\" -> ", end="", flush=True)
-            refined_text = self.refine_text(raw_text)
-            print(f"Done.")
-            self.perform_action(refined_text, raw_text)
-            
-        time.sleep(1.0)
-        self.indicator.hide()
-        self.active_profile = None
+        with self.hook_watchdog.measure("release"):
+            name = key_name(key)
+            self.current_keys.difference_update(expand_key(name))
+
+            profile = self.held_profile
+            if profile and name in profile['key_names']:
+                self.held_profile = None
+                self.control.submit(self._end_dictation, time.perf_counter())
+
+    def _safe_exit(self):
+        print("\n[!] Safe Exit triggered. Cleaning up...")
+        if self.tray and self.tray.icon:
+            self.tray.icon.stop()
+        self.stop_app()
+
+    def _begin_dictation(self, profile):
+        if self.recording:
+            return
+        # Runs after _init_services on the control thread; without its services a dictation cannot be processed
+        if not self.services_ready.is_set() or self.startup_error:
+            print(f"\n[!] Dictation unavailable, startup failed: {self.startup_error or 'still starting'}")
+            self.play_sound("error")
+            self.indicator.show("⚠️ STARTUP ERROR", "idle")
+            threading.Timer(2.0, self.indicator.hide).start()
+            return
+        self.active_profile = profile
+        self.start_recording()
+
+    def _end_dictation(self, released):
+        """Control thread: stop the capture and queue the dictation (`released` = hotkey release time)."""
+        if not (self.recording and self.active_profile):
+            return
+        audio = self.stop_recording()
+        streamer, self.streamer = self.streamer, None
+        profile, self.active_profile = self.active_profile, None
+        timer, self.timer = self.timer, None
+        if audio is not None:
+            timer.add("capture", (released - timer.started) * 1000)
+            job = DictationJob(audio, profile, self.config, streamer, timer)
+            job.released = released
+            if not self.pipeline.submit(job):
+                print(f" Queue full ({self.pipeline.depth} pending), dictation dropped.")
+                if streamer: streamer.cancel()
+                self.play_sound("error")
+                self._hide_when_idle()
+
+    def process_job(self, job):
+        """Worker stage: trim, transcribe and refine one dictation using its own snapshots."""
+        job.timer.since("queue", job.released)
+        if job.streamer:
+            # Earlier segments were transcribed while recording; only the tail is still in flight
+            with job.timer.stage("stt_wait"):
+                job.raw_text = job.streamer.finish()
+            if job.raw_text is not None: print(f" [{job.streamer.segments_submitted} segments]", end="", flush=True)
+            job.stats = dict(job.streamer.stats, audio_seconds=round(len(job.audio) / self.sample_rate, 2))
+        else:
+            audio, job.stats = self.prepare_audio(job.audio, job.config, job.timer)
+            if audio is None:
+                print(" No speech detected.")
+            else:
+                job.raw_text = self.transcribe_long_audio(audio, job.config, job.timer)
+        job.audio = None
+        if job.raw_text:
+            # Streamed refinements are generated during delivery so they paste in order
+            job.stream_refinement = self.should_stream_refinement(job)
+            if not job.stream_refinement:
+                with job.timer.stage("refine"):
+                    job.refined_text = self.refine_text(job.raw_text, job.profile, job.config)
+        job.processed = time.perf_counter()
+
+    def deliver_job(self, job):
+        """Delivery stage: runs in capture order on a single thread."""
+        # Time a finished job waited for earlier dictations to be delivered first
+        if job.processed: job.timer.since("ordering", job.processed)
+        if job.raw_text:
+            print(f" \"{job.raw_text}\" -> Done.")
+            self.perform_action(job)
+        if self.pipeline.depth <= 1:
+            self._hide_when_idle()
+        elif not self.recording:
+            self.indicator.update_text("PROCESSING...", "processing")
+
+    def _hide_when_idle(self, delay=1.0):
+        """Hide the indicator after a short delay unless a new recording or job came in."""
+        def hide():
+            if not self.recording and self.pipeline.depth == 0:
+                self.indicator.hide()
+        threading.Timer(delay, hide).start()
+
+def report_startup(app):
+    """Print the startup profile once the background initialisation (and the tray) is done."""
+    app.services_ready.wait()
+    if app.tray: app.tray.ready.wait(5)
+    startup.report()
 
 if __name__ == "__main__":
     # 1. Initialize UI (Main Thread Owner)
     indicator = RecordingIndicator()
+    startup.mark("indicator")
     
     # 2. Initialize App Logic (Pass UI reference)
     app = GroqSTT(indicator)
+    startup.mark("app init")
     
     # 3. Start Background Threads (Listener, Tray)
     app.start()
+    startup.mark("hotkeys ready")
+    if "--startup-profile" in sys.argv:
+        threading.Thread(target=report_startup, args=(app,), name="startup-report", daemon=True).start()
     
     # 4. Start Blocking UI Loop (Must be last)
     try:
         indicator.start_loop()
     except KeyboardInterrupt:
         print("\nExiting...")
-        os._exit(0)
\ No newline at end of file
+        if app.history_writer: app.history_writer.close()
+        os._exit(0)
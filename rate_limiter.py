@@ -0,0 +1,261 @@
+import re
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+import groq
+
+# Free-tier style defaults; override per model with "rate_limits" in config.json
+DEFAULT_LIMITS = {
+    "*": {"rpm": 30, "tpm": 6000},
+    "whisper-large-v3": {"rpm": 20},
+    "whisper-large-v3-turbo": {"rpm": 20},
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+}
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while the circuit breaker is open."""
+
+class RateLimitTimeout(Exception):
+    """Raised when a request would have to wait longer than the configured maximum."""
+
+def estimate_tokens(*texts):
+    """Rough chat token estimate (~4 chars per token), doubled to budget for the reply."""
+    return 2 * sum(len(t) for t in texts if t) // 4
+
+def parse_duration(value):
+    """Seconds from a Retry-After / x-ratelimit-reset-* value ("7", "1m2.5s", "120ms" or an HTTP date)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if parts:
+        return sum(float(n) * _UNITS[u] for n, u in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_after_from(error):
+    """Server-suggested wait in seconds from a rate-limit error's headers, or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    wait = parse_duration(headers.get("retry-after"))
+    if wait is not None:
+        return wait
+    waits = []
+    if headers.get("x-ratelimit-remaining-requests") == "0":
+        waits.append(parse_duration(headers.get("x-ratelimit-reset-requests")))
+    if headers.get("x-ratelimit-remaining-tokens") == "0":
+        waits.append(parse_duration(headers.get("x-ratelimit-reset-tokens")))
+    waits = [w for w in waits if w is not None]
+    return max(waits) if waits else None
+
+def classify_error(error):
+    """'rate_limit', 'transient' (API degraded, retry) or 'fatal' (do not retry)."""
+    if isinstance(error, groq.RateLimitError) or "rate_limit" in str(error).lower():
+        return "rate_limit"
+    if isinstance(error, groq.APIConnectionError):
+        return "transient"
+    if isinstance(error, groq.APIStatusError) and error.status_code >= 500:
+        return "transient"
+    return "fatal"
+
+class TokenBucket:
+    """Refills `per_minute` units per minute. Reservations may overdraw; the caller waits it off."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount, now):
+        """Take `amount` units and return how long the caller has to wait before using them."""
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+
+    def refund(self, amount):
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def block(self, seconds, now):
+        """Honour a server-side limit: nothing goes out for `seconds`, then only the retry."""
+        self._refill(now)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 1.0)
+
+class ModelLimiter:
+    """Requests-per-minute and (optionally) tokens-per-minute buckets for one model."""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=0, max_wait=30.0):
+        with self.lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests: wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens and tokens: wait = max(wait, self.tokens.reserve(tokens, now))
+            if wait > max_wait:
+                if self.requests: self.requests.refund(1)
+                if self.tokens and tokens: self.tokens.refund(tokens)
+                raise RateLimitTimeout(f"Rate limit: would need to wait {wait:.0f}s")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def block(self, seconds):
+        with self.lock:
+            now = time.monotonic()
+            for bucket in (self.requests, self.tokens):
+                if bucket: bucket.block(seconds, now)
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive transient failures and fails fast for `cooldown` seconds.
+
+    After the cooldown a single trial request is let through (half-open); its
+    outcome closes the circuit again or re-opens it. A trial that ends without
+    an outcome (rate-limited, or never sent) is released with `end_trial` so
+    the next request can try.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None: return "closed"
+            if time.monotonic() - self.opened_at < self.cooldown: return "open"
+            return "half_open"
+
+    def before_call(self):
+        """Raises CircuitOpenError while open; returns True if this call is the half-open trial."""
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining > 0 or self.trial_running:
+                raise CircuitOpenError(f"API degraded, failing fast (retry in {max(remaining, 0):.0f}s)")
+            self.trial_running = True
+            return True
+
+    def end_trial(self):
+        with self.lock:
+            self.trial_running = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+class RateLimiter:
+    """Client-side rate limiting, Retry-After aware backoff and a circuit breaker around API calls."""
+
+    def __init__(self, limits=None, retries=3, base_delay=2.0, max_delay=30.0, max_wait=30.0,
+                 breaker_threshold=5, breaker_cooldown=30.0):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.retries = max(1, retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.models = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            limits=config.get('rate_limits'),
+            retries=config.get('rate_limit_retries', 3),
+            base_delay=config.get('rate_limit_wait_seconds', 2),
+            max_delay=config.get('rate_limit_max_delay_seconds', 30),
+            max_wait=config.get('rate_limit_max_wait_seconds', 30),
+            breaker_threshold=config.get('circuit_breaker_threshold', 5),
+            breaker_cooldown=config.get('circuit_breaker_cooldown_seconds', 30)
+        )
+
+    def for_model(self, model):
+        with self.lock:
+            if model not in self.models:
+                limits = self.limits.get(model, self.limits["*"])
+                self.models[model] = ModelLimiter(limits.get("rpm"), limits.get("tpm"))
+            return self.models[model]
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, model, tokens=0):
+        """Run `func()` within the model's limits, retrying rate limits and transient failures."""
+        limiter = self.for_model(model)
+        for attempt in range(self.retries):
+            trial = self.breaker.before_call()
+            try:
+                limiter.acquire(tokens, self.max_wait)
+                try:
+                    result = func()
+                except Exception as e:
+                    kind = classify_error(e)
+                    if kind == "fatal":
+                        self.breaker.record_success()  # the API answered; it is not degraded
+                        raise
+                    if kind == "transient":
+                        self.breaker.record_failure()
+                    if attempt == self.retries - 1:
+                        raise
+
+                    delay = retry_after_from(e) if kind == "rate_limit" else None
+                    if delay is not None and delay > self.max_wait:
+                        raise
+                else:
+                    self.breaker.record_success()
+                    return result
+            finally:
+                # A trial that got a 429 or never went out leaves no verdict; free the slot for the next call
+                if trial: self.breaker.end_trial()
+
+            if delay is None:
+                delay = self.backoff(attempt)
+            else:
+                # Spread clients that got the same Retry-After
+                delay += random.uniform(0, min(1.0, 0.1 * delay + 0.1))
+            if kind == "rate_limit":
+                limiter.block(delay)
+            print(f"\n[{'Rate Limit' if kind == 'rate_limit' else 'API Error'}] Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+        return None
+
+    def stats(self):
+        return {"circuit": self.breaker.state, "consecutive_failures": self.breaker.failures}
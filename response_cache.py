@@ -0,0 +1,229 @@
+import os
+import atexit
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+CACHE_FILE = "cache.db"
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+def refinement_key(model, prompt, text):
+    """Cache key for a refinement: (model, final system prompt, normalized raw text)."""
+    raw = json.dumps([model, prompt, normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def transcription_key(audio, model):
+    """Cache key for a transcription: (content hash of the uploaded audio, STT model).
+
+    `audio` is bytes or a seekable binary stream, which is hashed in chunks and rewound.
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        digest = hashlib.sha256(audio).hexdigest()
+    else:
+        sha = hashlib.sha256()
+        audio.seek(0)
+        for chunk in iter(lambda: audio.read(64 * 1024), b""):
+            sha.update(chunk)
+        audio.seek(0)
+        digest = sha.hexdigest()
+    return f"{model}:{digest}"
+
+class ResponseCache:
+    """LRU cache with TTL, backed by a SQLite table so entries survive restarts.
+
+    Lookups hit a small in-memory LRU first and fall back to disk. Concurrent
+    `get_or_compute` calls for the same key are coalesced: only the first caller
+    runs `compute`, the others wait for its result. Values must be JSON-serializable.
+    The disk tier uses one SQLite connection, opened once and shared by all threads
+    behind `db_lock`; `close()` (also registered with atexit) releases it.
+    """
+
+    def __init__(self, path, table="responses", max_entries=500, ttl_seconds=7 * 86400,
+                 memory_entries=128, persist=True):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = min(memory_entries, max_entries)
+        self.persist = persist and path is not None
+        self.memory = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.writes = 0
+        if self.persist:
+            try:
+                self.db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                with self.db:
+                    self.db.execute(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                                    "(key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)")
+                atexit.register(self.close)
+            except sqlite3.Error as e:
+                print(f"[WARN] Cache disk tier disabled: {e}")
+                self.close()
+
+    def close(self):
+        """Close the disk connection; later lookups use the memory tier only."""
+        with self.db_lock:
+            db, self.db = self.db, None
+            self.persist = False
+        if db is not None:
+            db.close()
+
+    def _expired(self, created):
+        return self.ttl_seconds and time.time() - created > self.ttl_seconds
+
+    def _memory_put(self, key, value, created):
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _memory_get(self, key):
+        """(found, value) from the memory tier; the caller holds `lock`."""
+        entry = self.memory.get(key)
+        if entry:
+            if not self._expired(entry[1]):
+                self.memory.move_to_end(key)
+                return True, entry[0]
+            del self.memory[key]
+        return False, None
+
+    def _lookup(self, key):
+        """Returns (found, value) without touching the hit/miss counters."""
+        with self.lock:
+            found, value = self._memory_get(key)
+        if found:
+            return True, value
+        try:
+            with self.db_lock:
+                if not self.persist:
+                    return False, None
+                with self.db as db:
+                    row = db.execute(f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        return False, None
+                    if self._expired(row[1]):
+                        db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                        return False, None
+                    db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"[WARN] Cache read failed: {e}")
+            return False, None
+        value = json.loads(row[0])
+        with self.lock:
+            self._memory_put(key, value, row[1])
+        return True, value
+
+    def get(self, key):
+        found, value = self._lookup(key)
+        with self.lock:
+            if found: self.hits += 1
+            else: self.misses += 1
+        return value if found else None
+
+    def put(self, key, value):
+        now = time.time()
+        with self.lock:
+            self._memory_put(key, value, now)
+            self.writes += 1
+            prune = self.writes % 50 == 1
+        try:
+            with self.db_lock:
+                if not self.persist:
+                    return
+                with self.db as db:
+                    db.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                               (key, json.dumps(value), now, now))
+                    if prune:
+                        self._prune(db)
+        except sqlite3.Error as e:
+            print(f"[WARN] Cache write failed: {e}")
+
+    def _prune(self, db):
+        if self.ttl_seconds:
+            db.execute(f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl_seconds,))
+        db.execute(f"DELETE FROM {self.table} WHERE key NOT IN "
+                   f"(SELECT key FROM {self.table} ORDER BY accessed DESC LIMIT ?)", (self.max_entries,))
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """Return the cached value or run `compute()` once, even for concurrent callers.
+
+        Exceptions from `compute` propagate to every waiting caller and nothing is cached.
+        `None` results are not cached either, nor are values for which `cacheable(value)` is false.
+        """
+        found, value = self._lookup(key)
+        with self.lock:
+            if not found:
+                # An owner that finished since the lookup stored its value before leaving `inflight`
+                found, value = self._memory_get(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+            if value is not None and (cacheable is None or cacheable(value)):
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "memory_entries": len(self.memory),
+                "persistent": self.persist,
+            }
+
+def open_refinement_cache(config, base_dir):
+    """Refinement cache shared by the desktop app and the web server (None if disabled)."""
+    if not config.get('refinement_cache_enabled', True):
+        return None
+    return ResponseCache(
+        os.path.join(base_dir, CACHE_FILE), table="refinements",
+        max_entries=config.get('refinement_cache_max_entries', 500),
+        ttl_seconds=config.get('refinement_cache_ttl_hours', 168) * 3600
+    )
+
+def open_transcription_cache(config, base_dir):
+    """Transcription cache for re-sent audio; memory only unless `transcription_cache_disk` is set."""
+    if not config.get('transcription_cache_enabled', True):
+        return None
+    max_entries = config.get('transcription_cache_max_entries', 64)
+    return ResponseCache(
+        os.path.join(base_dir, CACHE_FILE), table="transcriptions",
+        max_entries=max_entries, memory_entries=max_entries,
+        ttl_seconds=config.get('transcription_cache_ttl_hours', 24) * 3600,
+        persist=config.get('transcription_cache_disk', False)
+    )
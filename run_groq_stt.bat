@@ -27,7 +27,7 @@ if not exist .env (
 
 :: 3. Environment Check
 set "USE_VENV=0"
-python -c "import groq, sounddevice, pynput, numpy, scipy, pyperclip" >nul 2>nul
+python -c "import groq, sounddevice, pynput, numpy, pyperclip" >nul 2>nul
 if %errorlevel% neq 0 (
     echo [w] Global packages missing. Using virtual environment...
     set "USE_VENV=1"
@@ -55,13 +55,15 @@ echo ====================================
 echo     1. Start Recording
 echo     2. Change Settings
 echo     3. View History
+echo     4. Latency Report
 echo     0. Exit
 echo ====================================
-set /p choice="Select an option (0-3): "
+set /p choice="Select an option (0-4): "
 
 if "%choice%"=="1" goto start_app
 if "%choice%"=="2" goto settings
 if "%choice%"=="3" goto history
+if "%choice%"=="4" goto latency
 if "%choice%"=="0" exit
 goto menu
 
@@ -81,3 +83,8 @@ goto menu
 python history_viewer.py
 pause
 goto menu
+
+:latency
+python latency_report.py
+pause
+goto menu
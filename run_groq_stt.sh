@@ -34,7 +34,7 @@ fi
 
 # 2. Environment Check
 echo "[i] Checking for required Python packages..."
-if $PYTHON_CMD -c "import groq, sounddevice, pynput, numpy, scipy, pyperclip" &> /dev/null; then
+if $PYTHON_CMD -c "import groq, sounddevice, pynput, numpy, pyperclip" &> /dev/null; then
     echo "[i] Global packages found."
 else
     echo "[w] Global packages missing. Using virtual environment..."
@@ -54,9 +54,10 @@ show_menu() {
     echo "    1. Start Recording"
     echo "    2. Change Settings"
     echo "    3. View History"
+    echo "    4. Latency Report"
     echo "    0. Exit"
     echo "===================================="
-    read -p "Select an option (0-3): " choice
+    read -p "Select an option (0-4): " choice
 }
 
 while true; do
@@ -78,6 +79,11 @@ while true; do
             read -p "Press Enter to return to menu..."
             clear
             ;;
+        4)
+            python latency_report.py
+            read -p "Press Enter to return to menu..."
+            clear
+            ;;
         0)
             echo "Exiting..."
             exit 0
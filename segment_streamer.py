@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import audio_processing
+from audio_chunking import transcribe_with_retry
+
+class SegmentStreamer:
+    """Cuts a live capture at pauses and transcribes finished segments in the background.
+
+    Audio blocks are fed in capture order. Once at least `min_segment_seconds` are
+    buffered and the tail holds `pause_ms` of silence, everything up to the middle
+    of that pause is sent to `transcribe_fn` on a worker thread. `finish` submits
+    the remaining tail and stitches all results together in capture order.
+
+    An optional `prepare_fn(segment) -> (segment or None, stats)` runs before
+    transcription; segments it drops are skipped and its numeric stats are summed
+    into `self.stats`. A failed segment is retried once; if it fails again the
+    whole dictation fails instead of being stitched together with a gap.
+    """
+
+    def __init__(self, transcribe_fn, sample_rate, min_segment_seconds=4.0, pause_ms=500,
+                 threshold_db=-40.0, max_workers=2, prepare_fn=None):
+        self.transcribe_fn = transcribe_fn
+        self.prepare_fn = prepare_fn
+        self.stats = {}
+        self.sample_rate = sample_rate
+        self.min_frames = int(min_segment_seconds * sample_rate)
+        self.pause_frames = int(pause_ms / 1000 * sample_rate)
+        self.threshold_db = threshold_db
+        self.window = max(1, sample_rate // 50)  # 20 ms analysis windows
+        self.pending = []
+        self.pending_frames = 0
+        self.frames_fed = 0
+        self.silent_run = 0
+        self.futures = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt-segment")
+
+    @property
+    def segments_submitted(self):
+        return len(self.futures)
+
+    def feed(self, block):
+        """Append a captured block and cut a segment if a pause boundary was reached."""
+        samples = block.reshape(-1)
+        if len(samples) == 0:
+            return
+        self.frames_fed += len(samples)
+        levels = audio_processing.frame_levels_db(samples, self.window)
+        voiced = np.flatnonzero(levels > self.threshold_db)
+        if len(voiced) == 0:
+            self.silent_run += len(samples)
+        else:
+            self.silent_run = max(0, len(samples) - (voiced[-1] + 1) * self.window)
+
+        self.pending.append(samples)
+        self.pending_frames += len(samples)
+
+        if self.pending_frames >= self.min_frames and self.silent_run >= self.pause_frames:
+            self._cut(self.pending_frames - self.silent_run // 2)
+
+    def _cut(self, cut_at):
+        audio = np.concatenate(self.pending)
+        segment, rest = audio[:cut_at], audio[cut_at:]
+        self.pending = [rest] if len(rest) else []
+        self.pending_frames = len(rest)
+        self.silent_run = len(rest)
+        self._submit(segment)
+
+    def _submit(self, segment):
+        with self.lock:
+            self.futures.append(self.executor.submit(self._process, segment))
+
+    def _process(self, segment):
+        if self.prepare_fn:
+            segment, stats = self.prepare_fn(segment)
+            with self.lock:
+                for key, value in stats.items():
+                    self.stats[key] = round(self.stats.get(key, 0) + value, 2)
+            if segment is None:
+                return ""
+        return transcribe_with_retry(self.transcribe_fn, segment)
+
+    def finish(self):
+        """Submit the remaining audio and return the stitched transcript (None if any segment failed)."""
+        if self.pending_frames:
+            self._submit(np.concatenate(self.pending))
+        self.pending, self.pending_frames = [], 0
+
+        with self.lock:
+            futures = list(self.futures)
+        results = []
+        for future in futures:
+            try: results.append(future.result())
+            except Exception as e:
+                print(f" Segment fail: {e}")
+                results.append(None)
+        self.executor.shutdown(wait=False)
+
+        failed = [i + 1 for i, r in enumerate(results) if r is None]
+        if failed:
+            print(f" Segment {', '.join(map(str, failed))} of {len(results)} failed twice; not using a partial transcript.")
+            return None
+        return " ".join(r for r in results if r)
+
+    def cancel(self):
+        """Drop pending audio and abandon segments that have not started yet."""
+        self.pending, self.pending_frames = [], 0
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,19 +1,24 @@
-import json
 import os
 import time
 import sys
 from pynput.keyboard import Key, KeyCode
+from config_store import ConfigStore
 
 try:
     import winreg
 except ImportError:
     winreg = None
 
-CONFIG_PATH = "config.json"
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+config_store = ConfigStore(CONFIG_PATH)
 
 STT_MODELS = [
     "whisper-large-v3-turbo",
-    "whisper-large-v3"
+    "whisper-large-v3",
+    # On-device (CPU, int8) via faster-whisper; no API calls
+    "local:base.en",
+    "local:small.en",
+    "local:large-v3-turbo"
 ]
 
 AI_MODELS = [
@@ -59,12 +64,11 @@ def set_autostart(enable=True):
         print(f"Error setting autostart: {e}")
 
 def load_config():
-    with open(CONFIG_PATH, "r") as f:
-        return json.load(f)
+    return config_store.load()
 
 def save_config(config):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=4)
+    # Atomic replace: a running desktop app or web server never reads a half-written file
+    config_store.save(config)
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
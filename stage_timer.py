@@ -0,0 +1,84 @@
+import time
+import threading
+from contextlib import contextmanager
+
+class StageTimer:
+    """Collects per-stage durations (monotonic clock, in ms) and size counters for one dictation.
+
+    Stages that run more than once (e.g. one STT call per streamed segment) are
+    summed. Safe to use from several worker threads at once.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.values = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name, ms):
+        with self.lock:
+            self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    def since(self, name, start):
+        """Record the time from `start` (a `time.perf_counter()` reading) until now as `name`."""
+        self.add(name, (time.perf_counter() - start) * 1000)
+
+    def count(self, name, amount):
+        with self.lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def entry(self):
+        """History log fields: {"timings_ms": {...}, **counters}."""
+        with self.lock:
+            timings = {k: round(v, 1) for k, v in self.timings.items()}
+            return dict(self.values, timings_ms=timings)
+
+class StartupProfile:
+    """Wall-clock breakdown of application startup, printed with `--startup-profile`.
+
+    `mark(name)` closes a sequential phase (time since the previous mark);
+    `phase(name)` times a block on any thread, e.g. imports deferred to a
+    background thread. Offsets are relative to the profile's creation.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last_mark = self.started
+        self.phases = []
+        self.lock = threading.Lock()
+
+    def _record(self, name, start, end):
+        with self.lock:
+            self.phases.append((name, threading.current_thread().name, start - self.started, end - start))
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self._record(name, self.last_mark, now)
+        self.last_mark = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter())
+
+    def report(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda p: p[2])
+        print("\n" + "=" * 64)
+        print("   ⏱️  STARTUP PROFILE")
+        print("=" * 64)
+        print(f"  {'Phase':<30} {'Thread':<16} {'At ms':>7} {'Took ms':>8}")
+        for name, thread, at, took in phases:
+            print(f"  {name:<30} {thread[:16]:<16} {at * 1000:>7.0f} {took * 1000:>8.1f}")
+        print("=" * 64 + "\n")
@@ -0,0 +1,236 @@
+import io
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import audio_processing
+import audio_encoding
+from audio_chunking import decode_upload
+
+try:
+    from faster_whisper import WhisperModel
+    LOCAL_AVAILABLE = True
+except ImportError:
+    LOCAL_AVAILABLE = False
+
+# stt_model values starting with this run on the local CPU engine, e.g. "local:base.en"
+LOCAL_PREFIX = "local:"
+LOCAL_SAMPLE_RATE = 16000
+
+def print_line(message):
+    print(f"[STT] {message}")
+
+def is_local(model):
+    return bool(model) and model.startswith(LOCAL_PREFIX)
+
+def local_model_name(model):
+    """faster-whisper model size/path for a "local:..." value (a bare name is accepted too)."""
+    return model[len(LOCAL_PREFIX):] if is_local(model) else model
+
+class GroqEngine:
+    """Remote transcription through the Groq API.
+
+    `request(func, model)` runs the API call; both apps pass their rate limiter
+    (buckets, Retry-After backoff, circuit breaker) here.
+    """
+    name = "groq"
+
+    def __init__(self, client, request, log=None):
+        self.client = client
+        self.request = request
+        self.log = log
+
+    def transcribe(self, audio, sample_rate, model, config, timer=None):
+        """Text for int16/float mono samples; encoded in memory with the configured format."""
+        filename, payload, stats = audio_encoding.encode(
+            audio, sample_rate, config.get('audio_format', 'flac'), config.get('audio_compression_level', 0.9))
+        if self.log: self.log(f"{stats['format'].upper()} {stats['bytes']/1024:.1f} KB, {stats['encode_ms']:.0f} ms")
+        if timer:
+            timer.add("encode", stats['encode_ms'])
+            timer.count("audio_bytes", stats['bytes'])
+        return self.transcribe_file(filename, payload, model, config)
+
+    def transcribe_file(self, filename, payload, model, config, timer=None):
+        """Text for an already encoded recording (bytes or a seekable stream)."""
+        def call_stt():
+            if hasattr(payload, "seek"):
+                payload.seek(0)  # retries re-send from the start
+            return self.client.audio.transcriptions.create(file=(filename, payload), model=model)
+        return self.request(call_stt, model).text.strip()
+
+_models = {}
+_models_lock = threading.Lock()
+
+def load_local_model(name, threads=0):
+    """The int8 CPU model for `name`, loaded once per process and kept for later requests."""
+    if not LOCAL_AVAILABLE:
+        raise RuntimeError("Local transcription needs faster-whisper (pip install faster-whisper)")
+    key = (name, threads)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            start = time.perf_counter()
+            model = WhisperModel(name, device="cpu", compute_type="int8", cpu_threads=threads)
+            print(f"[STT] Loaded local model {name} in {time.perf_counter() - start:.1f}s")
+            _models[key] = model
+        return model
+
+class LocalWhisperEngine:
+    """On-device transcription with faster-whisper (CTranslate2, int8 weights, CPU only).
+
+    No network round trip, so latency depends only on the audio length and the
+    model size. The model is loaded on first use (or by `preload`) and shared by
+    every later request in the process.
+    """
+    name = "local"
+
+    def _model(self, model, config):
+        return load_local_model(local_model_name(model), config.get('local_stt_threads', 0))
+
+    def preload(self, model, config):
+        """Load the model on a background thread so the first dictation does not wait for it."""
+        def load():
+            try:
+                self._model(model, config)
+            except Exception as e:
+                print(f"[WARN] Local STT model not loaded: {e}")
+        threading.Thread(target=load, name="stt-preload", daemon=True).start()
+
+    def transcribe(self, audio, sample_rate, model, config, timer=None):
+        samples = audio_processing.to_float(audio)
+        if sample_rate != LOCAL_SAMPLE_RATE and len(samples):
+            # Whisper works on 16 kHz; linear interpolation is enough for speech
+            n = int(len(samples) * LOCAL_SAMPLE_RATE / sample_rate)
+            samples = np.interp(np.linspace(0, len(samples) - 1, n), np.arange(len(samples)), samples).astype(np.float32)
+        whisper = self._model(model, config)
+        segments, _ = whisper.transcribe(
+            samples,
+            language=config.get('local_stt_language') or None,
+            beam_size=config.get('local_stt_beam_size', 1),
+            condition_on_previous_text=False
+        )
+        return " ".join(s.text.strip() for s in segments).strip()
+
+    def transcribe_file(self, filename, payload, model, config, timer=None):
+        stream = payload if hasattr(payload, "seek") else io.BytesIO(payload)
+        decoded = decode_upload(stream, LOCAL_SAMPLE_RATE)
+        if decoded is None:
+            raise RuntimeError(f"Cannot decode {filename} for local transcription (WebM needs ffmpeg on PATH)")
+        samples, rate = decoded
+        return self.transcribe(samples, rate, model, config)
+
+class SharedStream:
+    """Read-only view of an upload stream with its own position.
+
+    Views over the same stream share `lock` and seek the stream to their own
+    position for every read, so the remote request and a late local fallback
+    can read the one upload at the same time without copying it.
+    """
+
+    def __init__(self, stream, lock):
+        self.stream = stream
+        self.lock = lock
+        self.pos = 0
+
+    def read(self, size=-1):
+        with self.lock:
+            self.stream.seek(self.pos)
+            data = self.stream.read(size)
+        self.pos += len(data)
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            with self.lock:
+                offset += self.stream.seek(0, io.SEEK_END)
+        self.pos = max(0, offset)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+class FallbackEngine:
+    """Remote first; the local engine takes over when the remote call fails or is slow.
+
+    The remote request gets `stt_fallback_seconds`. If it has not answered by
+    then the local model starts on the same audio and whichever finishes first
+    wins (the remote answer is still used if it arrives before the local one).
+    Errors, including an open circuit breaker, switch to local immediately.
+    With a `timer`, switching counts as `stt_fallback` and a local answer as `stt_local`.
+    """
+
+    def __init__(self, remote, local, log=print_line, max_workers=8):
+        self.remote = remote
+        self.local = local
+        self.log = log
+        self.name = f"{remote.name}+{local.name}"
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt-engine")
+
+    def transcribe(self, audio, sample_rate, model, config, timer=None):
+        return self._race(config, timer,
+                          lambda: self.remote.transcribe(audio, sample_rate, model, config, timer),
+                          lambda m: self.local.transcribe(audio, sample_rate, m, config))
+
+    def transcribe_file(self, filename, payload, model, config, timer=None):
+        remote_payload = local_payload = payload
+        if hasattr(payload, "read"):
+            # The remote request may still be reading when the local decoder starts; each gets its own position
+            lock = threading.Lock()
+            remote_payload, local_payload = SharedStream(payload, lock), SharedStream(payload, lock)
+        return self._race(config, timer,
+                          lambda: self.remote.transcribe_file(filename, remote_payload, model, config),
+                          lambda m: self.local.transcribe_file(filename, local_payload, m, config))
+
+    def _race(self, config, timer, remote_fn, local_fn):
+        local_model = config.get('local_stt_model', 'base.en')
+        remote = self.executor.submit(remote_fn)
+        try:
+            return remote.result(timeout=config.get('stt_fallback_seconds', 4))
+        except Exception as e:
+            reason = "slow" if not remote.done() else f"failed: {e}"
+        self.log(f"remote STT {reason}, local {local_model_name(local_model)}")
+        if timer: timer.count("stt_fallback", 1)
+        local = self.executor.submit(local_fn, local_model)
+        pending = {remote, local}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is local and timer: timer.count("stt_local", 1)
+                    return future.result()
+        # Both failed; the remote error is the more useful one
+        self.log(f"local STT failed: {local.exception()}")
+        raise remote.exception()
+
+class STTEngines:
+    """Picks the engine for an `stt_model` value.
+
+    "local:<size>" runs on the CPU; any other model goes to Groq, wrapped in
+    `FallbackEngine` when `stt_fallback_enabled` is set and faster-whisper is
+    installed. `log(message)` receives progress notes (encoded size, fallbacks);
+    `log_encoding` also reports the size of every upload.
+    """
+
+    def __init__(self, client, request, log=print_line, log_encoding=False):
+        self.remote = GroqEngine(client, request, log if log_encoding else None)
+        self.local = LocalWhisperEngine()
+        self.fallback = FallbackEngine(self.remote, self.local, log)
+
+    def get(self, model, config):
+        if is_local(model):
+            return self.local
+        if LOCAL_AVAILABLE and config.get('stt_fallback_enabled', True):
+            return self.fallback
+        return self.remote
+
+    def preload(self, config):
+        """Load the local model in the background if the configuration can use it."""
+        if not LOCAL_AVAILABLE:
+            return
+        model = config.get('stt_model', '')
+        if is_local(model):
+            self.local.preload(model, config)
+        elif config.get('stt_fallback_enabled', True) and config.get('local_stt_preload', True):
+            self.local.preload(config.get('local_stt_model', 'base.en'), config)
@@ -1,13 +1,15 @@
 import os
+import sys
 import json
-import shutil
+import time
 import tempfile
+import threading
+from io import BytesIO
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Request, Response, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from groq import Groq
 from dotenv import load_dotenv
 
 # Setup paths
@@ -16,11 +18,39 @@ PROJECT_ROOT = os.path.dirname(BASE_DIR)
 CONFIG_PATH = os.path.join(PROJECT_ROOT, "config.json")
 HISTORY_PATH = os.path.join(PROJECT_ROOT, "history.log")
 ENV_PATH = os.path.join(PROJECT_ROOT, ".env")
+# Uploads without a duration are only decoded for chunking above this size (~1 min of browser Opus)
+CHUNK_PROBE_BYTES = 256 * 1024
+
+# Shared modules live in the project root
+sys.path.insert(0, PROJECT_ROOT)
+from groq_client import create_client
+from rate_limiter import RateLimiter, CircuitOpenError, RateLimitTimeout, estimate_tokens
+from stage_timer import StageTimer
+from config_store import ConfigStore
+from stt_engines import STTEngines
+from audio_chunking import plan_chunks, transcribe_chunks, decode_upload
+from history_store import open_history_store, purge_from_journal
+from history_writer import HistoryWriter
+from stream_sessions import StreamSessions
+from response_cache import open_refinement_cache, open_transcription_cache, refinement_key, transcription_key
 
 # Load environment
 load_dotenv(ENV_PATH)
 
+class UploadRequest(Request):
+    """Keeps uploads in memory; only bodies above `spill_bytes` (or of unknown size) go to an anonymous temp file.
+
+    Every request gets its own stream, so concurrent uploads never share a file.
+    """
+    spill_bytes = 2 * 1024 * 1024
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None or total_content_length > self.spill_bytes:
+            return tempfile.TemporaryFile("wb+")
+        return BytesIO()
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
 # Initialize Flask-Limiter with file-based storage
@@ -31,31 +61,282 @@ limiter = Limiter(
     storage_uri="memory://"  # Use memory storage (resets on restart) - change to "redis://" or "memcached://" for production
 )
 
+# Parsed once and re-read only when config.json changes (also when edited by the desktop app)
+config_store = ConfigStore(CONFIG_PATH)
+
+def load_config():
+    # Shared snapshot; do not modify
+    return config_store.get()
+
+def save_config(config):
+    config_store.save(config)
+
 # Initialize Groq
 api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
     print("WARNING: GROQ_API_KEY not found.")
-client = Groq(api_key=api_key)
+client = create_client(api_key, load_config().get('connection_keepalive_seconds', 120))
 
-def load_config():
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, "r") as f:
-            return json.load(f)
-    return {}
+# Upload limits: larger bodies are rejected with 413 before they are read
+def apply_upload_limits(config):
+    app.config['MAX_CONTENT_LENGTH'] = int(config.get('web_max_upload_mb', 25) * 1024 * 1024)
+    UploadRequest.spill_bytes = int(config.get('web_upload_spill_kb', 2048) * 1024)
 
-def save_config(config):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=4)
+apply_upload_limits(load_config())
+config_store.subscribe(apply_upload_limits)
+# Client-side API rate limits, Retry-After backoff and circuit breaker
+api_limiter = RateLimiter.from_config(load_config())
+# Groq, the local CPU model ("local:..." models) or Groq with local fallback, as in the desktop app
+stt_engines = STTEngines(client, api_limiter.call)
+stt_engines.preload(load_config())
+
+# Refinement cache shared with the desktop app (same cache.db)
+refinement_cache = open_refinement_cache(load_config(), PROJECT_ROOT)
+# Re-sent audio (client retries, re-runs with different persona sliders) skips the STT call
+transcription_cache = open_transcription_cache(load_config(), PROJECT_ROOT)
+
+# Live dictations from the page; segments are transcribed while the user keeps talking
+stream_sessions = StreamSessions(max_workers=load_config().get('web_stream_workers', 4))
+
+# Shared with the desktop app (same history.db); history.log stays the append-only journal
+history_store = open_history_store(PROJECT_ROOT)
+# Same writer as the desktop app: batched appends, rotation coordinated through history.log.lock
+history_writer = HistoryWriter.from_config(load_config(), HISTORY_PATH, history_store)
 
 def append_history(entry):
-    # Matches the logging format of main.py
-    # RotatingFileHandler in main.py writes plain messages, usually with a newline if configured standardly.
-    # We will just append to the file.
+    """Queue the entry for history.log and history.db (same JSONL format as main.py)."""
+    history_writer.write(entry)
+
+def purge_journal_async(uids):
+    """Drop deleted entries from history.log without holding up the response."""
+    def purge():
+        try:
+            with history_writer.locked():
+                purge_from_journal(history_writer.log_file, uids)
+        except Exception as e:
+            print(f"Error purging history log: {e}")
+    threading.Thread(target=purge, name="history-purge", daemon=True).start()
+
+def transcribe_in_chunks(audio_stream, audio_size, duration_seconds, config, stt_model, timer=None):
+    """Long uploads the server can decode go out as overlapping chunks in parallel.
+
+    Returns the merged text, or None when the upload should be sent as one request
+    (short, chunking disabled, or a format without a decoder here).
+    """
+    chunk_seconds = config.get('chunk_seconds', 45)
+    if not config.get('chunking_enabled', True):
+        return None
+    if duration_seconds is not None and duration_seconds <= chunk_seconds * 1.5:
+        return None
+    # Without the browser's duration only decode uploads big enough to possibly be long
+    if duration_seconds is None and audio_size < CHUNK_PROBE_BYTES:
+        return None
+    decoded = decode_upload(audio_stream)
+    if decoded is None:
+        return None
+    samples, rate = decoded
+    overlap_ms = config.get('chunk_overlap_ms', 1000)
+    ranges = plan_chunks(samples, rate, chunk_seconds, overlap_ms)
+    if len(ranges) == 1:
+        return None
+
+    engine = stt_engines.get(stt_model, config)
+
+    def transcribe_chunk(chunk):
+        return engine.transcribe(chunk, rate, stt_model, config, timer)
+
+    text, chunks = transcribe_chunks(samples, rate, transcribe_chunk, max_workers=config.get('chunk_workers', 4),
+                                     ranges=ranges)
+    if text is None:
+        raise RuntimeError(f"Part of the recording failed to transcribe ({chunks} chunks)")
+    print(f"[Chunking] {chunks} chunks from {len(samples) / rate:.0f}s upload")
+    return text
+
+def build_refinement_prompt(profile, chat_params_json):
+    """Profile prompt, replaced by persona rules when chat params leave the 40-60 range.
+
+    Returns (prompt, error); `error` is set when the chat params are invalid.
+    """
+    prompt = profile['prompt'] if profile else "Clean up this text."
+
+    # Parse Chat Params
+    if chat_params_json:
+        try:
+            params = json.loads(chat_params_json)
+            
+            # Validate chat params - must be integers between 0 and 100
+            valid_keys = ['humanRobot', 'factCreative', 'funnyRage', 'expertLame', 'formalSlang']
+            for key, value in params.items():
+                if key not in valid_keys:
+                    return None, f"Invalid parameter: {key}"
+                if not isinstance(value, (int, float)) or not (0 <= value <= 100):
+                    return None, f"Invalid value for {key}: must be between 0 and 100"
+            
+            # Dynamic Prompt Injection (AGGRESSIVE MODE)
+            extras = []
+            
+            # Human <-> Robot
+            hr = params.get('humanRobot', 50)
+            if hr < 40: extras.append("STYLE: You are an emotional human. Use hesitation, feelings, and warmth. Rewrite the text to sound purely human.")
+            elif hr > 60: extras.append("STYLE: You are a ROBOT. Use efficient, cold, calculated logic. NO emotion. Output should be like a log file or code comment.")
+            
+            # Fact <-> Creative
+            fc = params.get('factCreative', 50)
+            if fc < 40: extras.append("CONTENT: Be brutally factual. Remove any fluff. concise.")
+            elif fc > 60: extras.append("CONTENT: Be highly CREATIVE. Embellish the details. Paint a vivid picture. Use metaphors.")
+            
+            # Funny <-> Rage
+            fr = params.get('funnyRage', 50)
+            if fr < 40: extras.append("TONE: You are a Stand-up Comedian. Make it funny. Insert jokes/puns related to the text.")
+            elif fr > 60: extras.append("TONE: You are ANGRY. The text makes you mad. Rant about it. Use uppercase for checking/emphasis!")
+            
+            # Expert <-> Lame
+            el = params.get('expertLame', 50)
+            if el < 40: extras.append("COMPLEXITY: PhD Level. Use jargon, technical complexity, and sophisticated vocabulary.")
+            elif el > 60: extras.append("COMPLEXITY: Explain Like I'm 5 (ELI5). Use simple words. dumb it down.")
+            
+            # Formal <-> Slang
+            fs = params.get('formalSlang', 50)
+            if fs < 40: extras.append("LANGUAGE: Victorian Formal. 'Thou', 'Shall', extremely polite and structured.")
+            elif fs > 60: extras.append("LANGUAGE: Gen-Z / Street Slang. Use 'bruh', 'no cap', 'fr', emojis. Make it trendy.")
+            
+            if extras:
+                # Override base prompt to ensure specific instructions are followed
+                prompt = "TASK: Rewrite the following transcript completely based on these identity rules:\n"
+                prompt += "\n".join(extras)
+                prompt += "\n\nCRITICAL: Do not just fix grammar. You MUST assume the persona described above. Change words, sentence structure, and tone to match."
+                
+            print(f"DEBUG: Chat Params: {params}")
+            print(f"DEBUG: Final Prompt: {prompt}")
+
+        except Exception as e:
+            print(f"Error parsing chat params: {e}")
+
+    return prompt, None
+
+def refine_transcript(raw_text, prompt, config, timer):
+    """Refined text, or the raw text if refinement fails."""
+    refinement_model = config.get('refinement_model', 'llama-3.3-70b-versatile')
+
+    def refine():
+        completion = api_limiter.call(lambda: client.chat.completions.create(
+            model=refinement_model,
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": raw_text}
+            ]
+        ), refinement_model, estimate_tokens(prompt, raw_text))
+        return completion.choices[0].message.content.strip()
+
     try:
-        with open(HISTORY_PATH, "a", encoding='utf-8') as f:
-            f.write(json.dumps(entry) + "\n")
+        with timer.stage("refine"):
+            if refinement_cache:
+                return refinement_cache.get_or_compute(refinement_key(refinement_model, prompt, raw_text), refine)
+            return refine()
     except Exception as e:
-        print(f"Error writing history: {e}")
+        print(f"Refinement failed: {e}")
+        return raw_text
+
+def log_transcription(raw_text, refined_text, profile_name, chat_params_json, config, timer, audio_size,
+                      duration_seconds=None, **extra):
+    """Build the history entry (same fields as the desktop app's) and queue it. Returns the entry."""
+    log_entry = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "profile": profile_name,
+        "chat_params": chat_params_json, # Log params too
+        "raw_text": raw_text,
+        "refined_text": refined_text,
+        "stt_model": config.get('stt_model'),
+        "refinement_model": config.get('refinement_model'),
+        "audio_bytes": audio_size
+    }
+    if duration_seconds is not None:
+        log_entry["audio_seconds"] = round(duration_seconds, 2)
+    log_entry.update(extra)
+    timer.since("total", timer.started)
+    log_entry["timings_ms"] = timer.entry()["timings_ms"]
+    append_history(log_entry)
+    return log_entry
+
+def complete_transcription(raw_text, profile_name, chat_params_json, config, timer, audio_size,
+                           duration_seconds=None, stream=False, **extra):
+    """Refine and log a transcript. Answers with JSON, or with an SSE token stream when `stream` is set."""
+    profile = next((p for p in config['profiles'] if p['name'] == profile_name), None)
+    prompt = None
+    if config.get('refinement_enabled', True):
+        prompt, error = build_refinement_prompt(profile, chat_params_json)
+        if error:
+            return jsonify({"error": error}), 400
+
+    def log(refined_text):
+        return log_transcription(raw_text, refined_text, profile_name, chat_params_json, config, timer,
+                                 audio_size, duration_seconds, **extra)
+
+    if stream:
+        return Response(stream_refinement(raw_text, prompt, config, timer, log), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    refined_text = refine_transcript(raw_text, prompt, config, timer) if prompt is not None else raw_text
+    return jsonify({
+        "status": "success",
+        "raw": raw_text,
+        "refined": refined_text,
+        "entry": log(refined_text)
+    })
+
+def sse_event(event, **data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_refinement(raw_text, prompt, config, timer, log):
+    """SSE body: `raw` at once, `token` events as the refinement is generated, then `done` with the entry.
+
+    The entry is logged when the stream completes, or with what was generated so far
+    if the browser goes away first.
+    """
+    parts, entry = [], None
+    try:
+        yield sse_event("raw", raw=raw_text)
+        if prompt is not None:
+            refinement_model = config.get('refinement_model', 'llama-3.3-70b-versatile')
+            key = refinement_key(refinement_model, prompt, raw_text)
+            cached = refinement_cache.get(key) if refinement_cache else None
+            if cached is not None:
+                parts.append(cached)
+                yield sse_event("token", text=cached)
+            else:
+                def call_refinement():
+                    return client.chat.completions.create(
+                        model=refinement_model,
+                        messages=[
+                            {"role": "system", "content": prompt},
+                            {"role": "user", "content": raw_text}
+                        ],
+                        stream=True
+                    )
+                start, failed = time.perf_counter(), False
+                try:
+                    for chunk in api_limiter.call(call_refinement, refinement_model, estimate_tokens(prompt, raw_text)):
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta and not parts:
+                            delta = delta.lstrip()
+                            timer.since("first_token", start)
+                        if not delta:
+                            continue
+                        parts.append(delta)
+                        yield sse_event("token", text=delta)
+                except Exception as e:
+                    print(f"Refinement failed: {e}")
+                    failed = True
+                    yield sse_event("refine_error", error=str(e))
+                timer.since("refine", start)
+                if refinement_cache and parts and not failed:
+                    refinement_cache.put(key, "".join(parts).strip())
+        refined_text = "".join(parts).strip() or raw_text
+        entry = log(refined_text)
+        yield sse_event("done", raw=raw_text, refined=refined_text, entry=entry)
+    finally:
+        if entry is None:
+            log("".join(parts).strip() or raw_text)
 
 @app.route('/')
 def index():
@@ -71,214 +352,197 @@ def handle_config():
 
 @app.route('/api/history', methods=['GET'])
 def get_history():
-    history = []
-    if not os.path.exists(HISTORY_PATH):
-        return jsonify([])
-
+    """Newest first. Query: limit, cursor (id from X-Next-Cursor), q (full-text), profile, model."""
     try:
-        # Efficiently read the last 50 lines by seeking from the end
-        with open(HISTORY_PATH, "rb") as f:
-            f.seek(0, os.SEEK_END)
-            pos = f.tell()
-            buffer = b""
-            lines = []
-            
-            # Read backwards in 4KB chunks until we have enough lines
-            while pos > 0 and len(lines) <= 50:
-                chunk_size = min(pos, 4096)
-                pos -= chunk_size
-                f.seek(pos)
-                chunk = f.read(chunk_size)
-                buffer = chunk + buffer
-                lines = buffer.splitlines()
-            
-            # Process the last 50 lines (newest first)
-            for line_bytes in reversed(lines[-50:]):
-                line = line_bytes.decode('utf-8', errors='ignore').strip()
-                if line:
-                    try:
-                        history.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        pass
-                        
-        return jsonify(history)
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        cursor = request.args.get('cursor', type=int)
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    try:
+        entries, next_cursor = history_store.page(
+            limit, cursor,
+            query=request.args.get('q'),
+            profile=request.args.get('profile'),
+            model=request.args.get('model')
+        )
     except Exception as e:
         print(f"Error reading history: {e}")
         return jsonify([])
+    response = jsonify(entries)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
 
 @app.route('/api/record', methods=['POST'])
 @limiter.limit("15 per minute")
 def upload_audio():
-    if 'audio' not in request.files:
+    timer = StageTimer()
+    # The first access to request.files reads the body from the WSGI input and parses the form
+    with timer.stage("upload"):
+        files = request.files
+    if 'audio' not in files:
         return jsonify({"error": "No audio file"}), 400
     
-    audio_file = request.files['audio']
+    audio_file = files['audio']
     profile_name = request.form.get('profile', 'General')
-    
-    # Save temp
-    temp_filename = os.path.join(BASE_DIR, "temp_upload.webm") # Browser usually sends webm
-    audio_file.save(temp_filename)
+
+    # The upload stays in this request's own stream (memory, or a private temp file
+    # for large bodies) and is sent to the API from there
+    audio_stream = audio_file.stream
+    audio_size = audio_stream.seek(0, os.SEEK_END)
+    if not audio_size:
+        return jsonify({"error": "Empty audio file"}), 400
+    filename = audio_file.filename or "recording.webm" # Browser usually sends webm
     
     config = load_config()
-    file_path_to_send = temp_filename
+    # Recording length as measured by the browser (webm duration is not available server-side)
+    try:
+        duration_seconds = float(request.form['duration_ms']) / 1000
+    except (KeyError, ValueError):
+        duration_seconds = None
     
     # 1. Transcribe
     try:
-        with open(file_path_to_send, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=(temp_filename, file.read()),
-                model=config.get('stt_model', 'whisper-large-v3')
-            )
-        raw_text = transcription.text.strip()
+        stt_model = config.get('stt_model', 'whisper-large-v3')
+
+        def transcribe():
+            chunked = transcribe_in_chunks(audio_stream, audio_size, duration_seconds, config, stt_model, timer)
+            if chunked is not None:
+                return chunked
+            return stt_engines.get(stt_model, config).transcribe_file(filename, audio_stream, stt_model, config, timer)
+
+        with timer.stage("stt"):
+            if transcription_cache:
+                # Keyed by the requested model; text from the local fallback is not stored under it
+                raw_text = transcription_cache.get_or_compute(transcription_key(audio_stream, stt_model), transcribe,
+                                                              cacheable=lambda text: not timer.values.get("stt_local"))
+            else:
+                raw_text = transcribe()
+    except (CircuitOpenError, RateLimitTimeout) as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
 
-    # 2. Refine
-    refined_text = raw_text
-    profile = next((p for p in config['profiles'] if p['name'] == profile_name), None)
-    
-    if config.get('refinement_enabled', True):
-        prompt = profile['prompt'] if profile else "Clean up this text."
-        
-        # Parse Chat Params
-        chat_params_json = request.form.get('chatParams')
-        if chat_params_json:
-            try:
-                params = json.loads(chat_params_json)
-                
-                # Validate chat params - must be integers between 0 and 100
-                valid_keys = ['humanRobot', 'factCreative', 'funnyRage', 'expertLame', 'formalSlang']
-                for key, value in params.items():
-                    if key not in valid_keys:
-                        return jsonify({"error": f"Invalid parameter: {key}"}), 400
-                    if not isinstance(value, (int, float)) or not (0 <= value <= 100):
-                        return jsonify({"error": f"Invalid value for {key}: must be between 0 and 100"}), 400
-                
-                # Dynamic Prompt Injection (AGGRESSIVE MODE)
-                extras = []
-                
-                # Human <-> Robot
-                hr = params.get('humanRobot', 50)
-                if hr < 40: extras.append("STYLE: You are an emotional human. Use hesitation, feelings, and warmth. Rewrite the text to sound purely human.")
-                elif hr > 60: extras.append("STYLE: You are a ROBOT. Use efficient, cold, calculated logic. NO emotion. Output should be like a log file or code comment.")
-                
-                # Fact <-> Creative
-                fc = params.get('factCreative', 50)
-                if fc < 40: extras.append("CONTENT: Be brutally factual. Remove any fluff. concise.")
-                elif fc > 60: extras.append("CONTENT: Be highly CREATIVE. Embellish the details. Paint a vivid picture. Use metaphors.")
-                
-                # Funny <-> Rage
-                fr = params.get('funnyRage', 50)
-                if fr < 40: extras.append("TONE: You are a Stand-up Comedian. Make it funny. Insert jokes/puns related to the text.")
-                elif fr > 60: extras.append("TONE: You are ANGRY. The text makes you mad. Rant about it. Use uppercase for checking/emphasis!")
-                
-                # Expert <-> Lame
-                el = params.get('expertLame', 50)
-                if el < 40: extras.append("COMPLEXITY: PhD Level. Use jargon, technical complexity, and sophisticated vocabulary.")
-                elif el > 60: extras.append("COMPLEXITY: Explain Like I'm 5 (ELI5). Use simple words. dumb it down.")
-                
-                # Formal <-> Slang
-                fs = params.get('formalSlang', 50)
-                if fs < 40: extras.append("LANGUAGE: Victorian Formal. 'Thou', 'Shall', extremely polite and structured.")
-                elif fs > 60: extras.append("LANGUAGE: Gen-Z / Street Slang. Use 'bruh', 'no cap', 'fr', emojis. Make it trendy.")
-                
-                if extras:
-                    # Override base prompt to ensure specific instructions are followed
-                    prompt = "TASK: Rewrite the following transcript completely based on these identity rules:\n"
-                    prompt += "\n".join(extras)
-                    prompt += "\n\nCRITICAL: Do not just fix grammar. You MUST assume the persona described above. Change words, sentence structure, and tone to match."
-                    
-                print(f"DEBUG: Chat Params: {params}")
-                print(f"DEBUG: Final Prompt: {prompt}")
-
-            except Exception as e:
-                print(f"Error parsing chat params: {e}")
+    # 2. Refine and 3. Log
+    return complete_transcription(raw_text, profile_name, request.form.get('chatParams'), config, timer,
+                                  audio_size, duration_seconds, stream=request.args.get('stream') == '1')
 
-        try:
-            completion = client.chat.completions.create(
-                model=config.get('refinement_model', 'llama-3.3-70b-versatile'),
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": raw_text}
-                ]
-            )
-            refined_text = completion.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Refinement failed: {e}")
+@app.route('/api/stream/start', methods=['POST'])
+@limiter.limit("15 per minute")
+def stream_start():
+    data = request.json or {}
+    session = stream_sessions.start(data.get('profile', 'General'))
+    return jsonify({"id": session.id})
 
-    # 3. Log
-    log_entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "profile": profile_name,
-        "chat_params": request.form.get('chatParams'), # Log params too
-        "raw_text": raw_text,
-        "refined_text": refined_text,
-        "stt_model": config.get('stt_model'),
-        "refinement_model": config.get('refinement_model')
-    }
-    append_history(log_entry)
+@app.route('/api/stream/<session_id>/segment', methods=['POST'])
+@limiter.exempt
+def stream_segment(session_id):
+    """One finished segment (a complete recording cut at a pause); transcribed in the background."""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown stream"}), 404
+    if 'audio' not in request.files:
+        return jsonify({"error": "No audio file"}), 400
+    try:
+        index = int(request.form['index'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Missing segment index"}), 400
+    audio_file = request.files['audio']
+    audio = audio_file.stream.read()
+    if not audio:
+        return jsonify({"error": "Empty audio file"}), 400
+    config = load_config()
+    stt_model = config.get('stt_model', 'whisper-large-v3')
+    engine = stt_engines.get(stt_model, config)
+
+    def transcribe(filename, payload):
+        return engine.transcribe_file(filename, payload, stt_model, config)
+
+    stream_sessions.submit(session, index, audio, audio_file.filename or f"segment-{index}.webm", transcribe)
+    return jsonify({"status": "accepted", "index": index}), 202
+
+@app.route('/api/stream/<session_id>/events', methods=['GET'])
+@limiter.exempt
+def stream_events(session_id):
+    """SSE: a `partial` event with the transcript so far each time a segment is transcribed."""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown stream"}), 404
+    return Response(session.sse(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/stream/<session_id>/finish', methods=['POST'])
+@limiter.exempt
+def stream_finish(session_id):
+    """Wait for the last segment(s), then refine and log like /api/record."""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown stream"}), 404
+    data = request.json or {}
+    config = load_config()
+    timer = StageTimer()
+    try:
+        with timer.stage("stt_wait"):
+            raw_text = session.finish(data.get('segments'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        stream_sessions.remove(session_id)
+    if not raw_text:
+        return jsonify({"error": "Transcription failed"}), 500
+
+    try:
+        duration_seconds = float(data['duration_ms']) / 1000
+    except (KeyError, TypeError, ValueError):
+        duration_seconds = None
+    return complete_transcription(raw_text, data.get('profile') or session.profile_name, data.get('chatParams'),
+                                  config, timer, session.audio_bytes, duration_seconds,
+                                  stream=request.args.get('stream') == '1', segments=len(session.futures))
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    return jsonify({"error": f"Upload too large (max {limit_mb:g} MB)"}), 413
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
     return jsonify({
-        "status": "success",
-        "raw": raw_text,
-        "refined": refined_text,
-        "entry": log_entry
+        "refinement": refinement_cache.stats() if refinement_cache else None,
+        "transcription": transcription_cache.stats() if transcription_cache else None
     })
 
 @app.route('/api/history/delete', methods=['POST'])
 def delete_history_item():
-    data = request.json
-    timestamp_to_delete = data.get('timestamp')
-    
-    if not timestamp_to_delete:
-        return jsonify({"error": "Missing timestamp"}), 400
-
-    if not os.path.exists(HISTORY_PATH):
-        return jsonify({"error": "History file not found"}), 404
+    data = request.json or {}
+    entry_id = data.get('id')
+    if entry_id is None and data.get('uid'):
+        # Entries shown right after a dictation carry only their uid; they may still be queued for writing
+        entry_id = history_store.find_by_uid(str(data['uid']))
+        if entry_id is None and history_writer.flush(5):
+            entry_id = history_store.find_by_uid(str(data['uid']))
+        if entry_id is None:
+            return jsonify({"error": "Item not found"}), 404
+    if entry_id is None:
+        # Older clients delete by timestamp; resolve it to the newest matching entry
+        timestamp = data.get('timestamp')
+        if not timestamp:
+            return jsonify({"error": "Missing id"}), 400
+        matches = history_store.find_by_timestamp(timestamp)
+        entry_id = matches[0] if matches else None
 
     try:
-        # Read all lines
-        with open(HISTORY_PATH, "r", encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # Rewrite file excluding the matching item using atomic write
-        # We assume one entry per line as enforced by append_history
-        deleted = False
-        
-        # Create temp file in the same directory for atomic rename
-        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(HISTORY_PATH))
-        try:
-            with os.fdopen(fd, 'w', encoding='utf-8') as f:
-                for line in lines:
-                    try:
-                        entry = json.loads(line)
-                        if entry.get("timestamp") == timestamp_to_delete:
-                            deleted = True
-                            continue # Skip writing this line
-                        f.write(line)
-                    except json.JSONDecodeError:
-                        f.write(line) # Preserve malformed lines just in case
-            
-            # Atomic replace
-            shutil.move(temp_path, HISTORY_PATH)
-        except Exception:
-            # Clean up temp file if something went wrong
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            raise
-        
-        if deleted:
-            return jsonify({"status": "success"})
-        else:
-            return jsonify({"error": "Item not found"}), 404
-            
+        uid = history_store.delete(int(entry_id)) if entry_id is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid id"}), 400
     except Exception as e:
         print(f"Error deleting history item: {e}")
         return jsonify({"error": str(e)}), 500
 
+    if uid is None:
+        return jsonify({"error": "Item not found"}), 404
+    purge_journal_async([uid])
+    return jsonify({"status": "success", "id": int(entry_id)})
+
 import webbrowser
 import threading
 from waitress import serve
@@ -297,4 +561,5 @@ if __name__ == '__main__':
     threading.Timer(1.5, open_browser).start()
     
     # Use waitress for production-grade WSGI server (removes Flask dev warning)
-    serve(app, host='0.0.0.0', port=8091)
+    # Live dictation keeps one thread per open event stream, so run a few more than Waitress's default 4
+    serve(app, host='0.0.0.0', port=8091, threads=load_config().get('web_threads', 8))
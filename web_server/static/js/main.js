@@ -5,6 +5,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const profileSelect = document.getElementById('profile-select');
     const promptDisplay = document.getElementById('prompt-display');
     const historyList = document.getElementById('history-list');
+    const historySearch = document.getElementById('history-search');
+    const historyMoreBtn = document.getElementById('history-more');
 
     // Modals
     const settingsBtn = document.getElementById('settings-btn');
@@ -20,7 +22,12 @@ document.addEventListener('DOMContentLoaded', () => {
     let isRecording = false;
     let mediaRecorder = null;
     let audioChunks = [];
+    let recordingStartedAt = 0;
+    let recordingDurationMs = 0;
+    let live = null;
     let config = null;
+    let historyCursor = null;
+    let historySearchTimer = null;
 
     // 1. Initial Load
     fetchConfig();
@@ -144,22 +151,18 @@ document.addEventListener('DOMContentLoaded', () => {
     async function startRecording() {
         try {
             const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-            mediaRecorder = new MediaRecorder(stream);
-            audioChunks = [];
-
-            mediaRecorder.addEventListener('dataavailable', event => {
-                audioChunks.push(event.data);
-            });
-
-            mediaRecorder.addEventListener('stop', async () => {
-                const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
-                processAudio(audioBlob);
-
-                // Stop all tracks
-                stream.getTracks().forEach(track => track.stop());
-            });
-
-            mediaRecorder.start();
+            recordingStartedAt = performance.now();
+            if (setting('web_streaming_enabled', true) && window.EventSource && window.AudioContext) {
+                try {
+                    await startLiveRecording(stream);
+                } catch (err) {
+                    console.warn("Live transcription unavailable, recording the whole clip:", err);
+                    live = null;
+                    startClipRecording(stream);
+                }
+            } else {
+                startClipRecording(stream);
+            }
             isRecording = true;
             micBtn.classList.add('recording');
             micBtn.innerHTML = '<i class="fa-solid fa-stop"></i>';
@@ -170,9 +173,35 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function setting(key, fallback) {
+        return config && config[key] !== undefined ? config[key] : fallback;
+    }
+
+    // Whole clip: uploaded to /api/record after the user stops
+    function startClipRecording(stream) {
+        mediaRecorder = new MediaRecorder(stream);
+        audioChunks = [];
+
+        mediaRecorder.addEventListener('dataavailable', event => {
+            audioChunks.push(event.data);
+        });
+
+        mediaRecorder.addEventListener('stop', async () => {
+            const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
+            processAudio(audioBlob);
+
+            // Stop all tracks
+            stream.getTracks().forEach(track => track.stop());
+        });
+
+        mediaRecorder.start();
+    }
+
     function stopRecording() {
-        if (mediaRecorder && isRecording) {
-            mediaRecorder.stop();
+        if (isRecording) {
+            recordingDurationMs = Math.round(performance.now() - recordingStartedAt);
+            if (live) stopLiveRecording();
+            else if (mediaRecorder) mediaRecorder.stop();
             isRecording = false;
             micBtn.classList.remove('recording');
             micBtn.innerHTML = '<i class="fa-solid fa-microphone"></i>';
@@ -180,46 +209,224 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Live mode: the recorder restarts at every pause, so each segment is a complete file the
+    // server transcribes while the user keeps talking; partial transcripts come back over SSE
+    async function startLiveRecording(stream) {
+        const res = await fetch('/api/stream/start', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ profile: profileSelect.value })
+        });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error || res.status);
+
+        const audioContext = new AudioContext();
+        const analyser = audioContext.createAnalyser();
+        analyser.fftSize = 2048;
+        audioContext.createMediaStreamSource(stream).connect(analyser);
+
+        live = {
+            id: data.id,
+            stream,
+            audioContext,
+            analyser,
+            samples: new Float32Array(analyser.fftSize),
+            events: new EventSource(`/api/stream/${data.id}/events`),
+            recorder: null,
+            index: 0,
+            uploads: [],
+            segmentStartedAt: 0,
+            silentSince: null,
+            timer: null
+        };
+        live.events.addEventListener('partial', event => {
+            const update = JSON.parse(event.data);
+            if (update.transcript) {
+                document.getElementById('last-text-display').textContent = update.transcript;
+            }
+        });
+        startSegment(live);
+        live.timer = setInterval(() => checkForPause(live), 50);
+    }
+
+    function startSegment(session) {
+        const recorder = new MediaRecorder(session.stream);
+        const chunks = [];
+        const index = session.index++;
+        recorder.addEventListener('dataavailable', event => {
+            if (event.data.size) chunks.push(event.data);
+        });
+        session.uploads.push(new Promise(resolve => {
+            recorder.addEventListener('stop', () => {
+                resolve(uploadSegment(session.id, index, new Blob(chunks, { type: recorder.mimeType || 'audio/webm' })));
+            });
+        }));
+        recorder.start();
+        session.recorder = recorder;
+        session.segmentStartedAt = performance.now();
+        session.silentSince = null;
+    }
+
+    function checkForPause(session) {
+        session.analyser.getFloatTimeDomainData(session.samples);
+        let sum = 0;
+        for (const v of session.samples) sum += v * v;
+        const levelDb = 10 * Math.log10(sum / session.samples.length + 1e-12);
+        const now = performance.now();
+
+        if (levelDb > setting('silence_threshold_db', -40)) {
+            session.silentSince = null;
+            return;
+        }
+        if (session.silentSince === null) session.silentSince = now;
+        const longEnough = now - session.segmentStartedAt >= setting('streaming_min_segment_seconds', 4) * 1000;
+        if (longEnough && now - session.silentSince >= setting('streaming_pause_ms', 500)) {
+            // Start the next segment before stopping this one so no audio falls between them
+            const previous = session.recorder;
+            startSegment(session);
+            previous.stop();
+        }
+    }
+
+    async function uploadSegment(sessionId, index, blob) {
+        if (!blob.size) return false;
+        const formData = new FormData();
+        formData.append('audio', blob, `segment-${index}.webm`);
+        formData.append('index', index);
+        try {
+            const res = await fetch(`/api/stream/${sessionId}/segment`, { method: 'POST', body: formData });
+            return res.ok;
+        } catch (err) {
+            console.error("Segment upload failed:", err);
+            return false;
+        }
+    }
+
+    async function stopLiveRecording() {
+        const session = live;
+        live = null;
+        clearInterval(session.timer);
+        session.recorder.stop();
+        // Only the last segment is still uploading; earlier ones are already transcribed
+        const uploaded = await Promise.all(session.uploads);
+        session.stream.getTracks().forEach(track => track.stop());
+        session.audioContext.close();
+
+        try {
+            const res = await fetch(`/api/stream/${session.id}/finish${refinementStreamQuery()}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    profile: profileSelect.value,
+                    chatParams: JSON.stringify(chatParams),
+                    duration_ms: recordingDurationMs,
+                    segments: uploaded.filter(Boolean).length
+                })
+            });
+            await readResult(res);
+        } catch (err) {
+            console.error(err);
+            statusText.textContent = "Error";
+            alert("Network Error: " + err.message);
+        } finally {
+            session.events.close();
+        }
+    }
+
     async function processAudio(blob) {
         const formData = new FormData();
         formData.append('audio', blob, 'recording.webm');
         formData.append('profile', profileSelect.value);
         formData.append('chatParams', JSON.stringify(chatParams));
+        formData.append('duration_ms', recordingDurationMs);
 
         console.log("Sending Audio with Params:", chatParams); // Debug Log
 
         try {
-            const res = await fetch('/api/record', {
+            const res = await fetch('/api/record' + refinementStreamQuery(), {
                 method: 'POST',
                 body: formData
             });
-            const data = await res.json();
+            await readResult(res);
+        } catch (err) {
+            console.error(err);
+            statusText.textContent = "Error";
+            alert("Network Error: " + err.message);
+        }
+    }
 
-            if (data.status === 'success') {
-                document.getElementById('last-text-display').textContent = data.refined;
+    function refinementStreamQuery() {
+        return setting('web_stream_refinement', true) && window.ReadableStream ? '?stream=1' : '';
+    }
 
-                // Copy to Clipboard (Silent)
-                try {
-                    await navigator.clipboard.writeText(data.refined);
-                } catch (err) {
-                    console.error("Clipboard copy failed:", err);
-                }
+    // Streamed responses send the raw transcript first, then refinement tokens as they are generated
+    async function readResult(res) {
+        const contentType = res.headers.get('Content-Type') || '';
+        if (!contentType.startsWith('text/event-stream')) return showResult(await res.json());
+
+        const display = document.getElementById('last-text-display');
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let refined = '';
+        let result = null;
+
+        const handle = (type, data) => {
+            if (type === 'raw') {
+                display.textContent = data.raw;
+                statusText.textContent = "Refining...";
+            } else if (type === 'token') {
+                refined += data.text;
+                display.textContent = refined;
+            } else if (type === 'refine_error') {
+                console.error("Refinement failed:", data.error);
+            } else if (type === 'done') {
+                result = { status: 'success', raw: data.raw, refined: data.refined, entry: data.entry };
+            }
+        };
 
-                // Update Status Text with Instruction
-                statusText.innerHTML = 'Done! <span style="font-size:0.85em; opacity:0.8; margin-left: 5px;">(Ctrl+V to paste)</span>';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let type = 'message';
+                let data = '';
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) type = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (data) handle(type, JSON.parse(data));
+            }
+        }
+        await showResult(result || { error: "Connection closed before the refinement finished" });
+    }
 
-                // Longer timeout to read message
-                setTimeout(() => statusText.textContent = "Ready to Record", 4000);
+    async function showResult(data) {
+        if (data.status === 'success') {
+            document.getElementById('last-text-display').textContent = data.refined;
 
-                fetchHistory(); // Refresh history
-            } else {
-                statusText.textContent = "Error";
-                alert("Error: " + (data.error || "Unknown"));
+            // Copy to Clipboard (Silent)
+            try {
+                await navigator.clipboard.writeText(data.refined);
+            } catch (err) {
+                console.error("Clipboard copy failed:", err);
             }
-        } catch (err) {
-            console.error(err);
+
+            // Update Status Text with Instruction
+            statusText.innerHTML = 'Done! <span style="font-size:0.85em; opacity:0.8; margin-left: 5px;">(Ctrl+V to paste)</span>';
+
+            // Longer timeout to read message
+            setTimeout(() => statusText.textContent = "Ready to Record", 4000);
+
+            // The server writes history in the background; show the returned entry right away
+            if (!historySearch.value.trim()) addHistoryItem(data.entry, true);
+        } else {
             statusText.textContent = "Error";
-            alert("Network Error: " + err.message);
+            alert("Error: " + (data.error || "Unknown"));
         }
     }
 
@@ -392,15 +599,32 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // History Logic (Existing)
-    async function fetchHistory() {
+    // History Logic: pages of 50, newest first; the server hands out the next cursor
+    historySearch.addEventListener('input', () => {
+        clearTimeout(historySearchTimer);
+        historySearchTimer = setTimeout(() => fetchHistory(), 250);
+    });
+    historyMoreBtn.addEventListener('click', () => fetchHistory(true));
+
+    async function fetchHistory(more = false) {
+        const query = historySearch.value.trim();
+        const params = new URLSearchParams({ limit: 50 });
+        if (query) params.set('q', query);
+        if (more && historyCursor) params.set('cursor', historyCursor);
+
         try {
-            const res = await fetch('/api/history');
+            const res = await fetch('/api/history?' + params);
             const history = await res.json();
-            historyList.innerHTML = '';
+            historyCursor = res.headers.get('X-Next-Cursor');
+            historyMoreBtn.classList.toggle('hidden', !historyCursor);
+            if (!more) historyList.innerHTML = '';
 
-            if (history.length === 0) {
-                historyList.innerHTML = `
+            if (history.length === 0 && !more) {
+                historyList.innerHTML = query ? `
+                    <div style="text-align: center; padding: 2rem; color: var(--text-muted); opacity: 0.7;">
+                        <p style="font-style: italic;">Nothing matches "${escapeHtml(query)}" 🔍</p>
+                    </div>
+                ` : `
                     <div style="text-align: center; padding: 2rem; color: var(--text-muted); opacity: 0.7;">
                         <i class="fa-solid fa-ghost" style="font-size: 2.5rem; margin-bottom: 1rem;"></i>
                         <p style="font-style: italic;">It's ghost-town quiet in here... 👻<br>Start yapping to scare them away!</p>
@@ -411,7 +635,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
 
             // Restore last transcription from history on load
-            if (history.length > 0) {
+            if (history.length > 0 && !more && !query) {
                 const latest = history[0]; // API returns newest first
                 const text = latest.refined_text || latest.raw_text;
                 const display = document.getElementById('last-text-display');
@@ -423,22 +647,22 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Escape HTML to prevent XSS
+    function escapeHtml(text) {
+        const map = {
+            '&': '&amp;',
+            '<': '&lt;',
+            '>': '&gt;',
+            '"': '&quot;',
+            "'": '&#039;'
+        };
+        return (text || '').replace(/[&<>"']/g, function (m) { return map[m]; });
+    }
+
     function addHistoryItem(item, prepend) {
         const div = document.createElement('div');
         div.className = 'history-item';
 
-        // Escape HTML to prevent XSS
-        const escapeHtml = (text) => {
-            const map = {
-                '&': '&amp;',
-                '<': '&lt;',
-                '>': '&gt;',
-                '"': '&quot;',
-                "'": '&#039;'
-            };
-            return (text || '').replace(/[&<>"']/g, function (m) { return map[m]; });
-        };
-
         // Check for Custom Personality
         let personalityBadge = '';
         if (item.chat_params) {
@@ -478,7 +702,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 const res = await fetch('/api/history/delete', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ timestamp: item.timestamp })
+                    // Fresh results carry their uid (no id until written); listed entries have both
+                    body: JSON.stringify(item.uid ? { uid: item.uid } : { id: item.id })
                 });
                 const data = await res.json();
 
@@ -512,7 +737,11 @@ document.addEventListener('DOMContentLoaded', () => {
             });
         });
 
-        if (prepend) historyList.prepend(div);
+        if (prepend) {
+            // Drop the empty-state placeholder
+            if (!historyList.querySelector('.history-item')) historyList.innerHTML = '';
+            historyList.prepend(div);
+        }
         else historyList.appendChild(div);
     }
 });
@@ -0,0 +1,151 @@
+import json
+import time
+import queue
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class StreamSession:
+    """One live dictation from the browser: segments arrive while the user is still speaking.
+
+    Each segment is a complete recording (the page restarts its MediaRecorder at
+    pauses) and is transcribed in the background as soon as it arrives. Finished
+    segments are announced on `events` (read by the SSE endpoint) with the
+    transcript so far; `finish()` waits for whatever is still in flight. A
+    session with no new segment for `idle_seconds` counts as abandoned.
+    """
+
+    def __init__(self, session_id, profile_name, idle_seconds=600):
+        self.id = session_id
+        self.profile_name = profile_name
+        self.idle_seconds = idle_seconds
+        self.futures = {}
+        self.texts = {}
+        self.audio_bytes = 0
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.touched = time.monotonic()
+        self.closed = False
+
+    def add(self, index, future, size):
+        with self.lock:
+            self.futures[index] = future
+            self.audio_bytes += size
+            self.touched = time.monotonic()
+
+    def idle(self):
+        return time.monotonic() - self.touched > self.idle_seconds
+
+    def transcript(self, complete_only=True):
+        """Segments joined in order; with `complete_only`, stop at the first one still pending."""
+        with self.lock:
+            parts = []
+            for index in sorted(self.futures):
+                if index not in self.texts:
+                    if complete_only:
+                        break
+                    continue
+                if self.texts[index]:
+                    parts.append(self.texts[index])
+            return " ".join(parts)
+
+    def segment_done(self, index, text, error=None):
+        with self.lock:
+            self.texts[index] = text
+        if error:
+            self.publish("segment_error", index=index, error=error)
+        else:
+            self.publish("partial", index=index, text=text, transcript=self.transcript())
+
+    def publish(self, event, **data):
+        self.events.put((event, data))
+
+    def finish(self, expected=None, timeout=120):
+        """Wait for every segment and return the full transcript (None if every segment failed)."""
+        with self.lock:
+            futures = dict(self.futures)
+        if expected is not None and expected != len(futures):
+            raise ValueError(f"Expected {expected} segments, received {len(futures)}")
+        for future in futures.values():
+            try: future.result(timeout)
+            except Exception: pass
+        with self.lock:
+            if futures and all(not self.texts.get(i) for i in futures):
+                return None
+        return self.transcript(complete_only=False)
+
+    def close(self):
+        """Stop the event stream and drop segments that have not started yet (and their audio)."""
+        self.closed = True
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+        self.publish("closed")
+
+    def sse(self, keepalive_seconds=15):
+        """Server-sent events for this session until it finishes, is closed or goes idle."""
+        yield "retry: 2000\n\n"
+        while not self.closed or not self.events.empty():
+            try:
+                event, data = self.events.get(timeout=keepalive_seconds)
+            except queue.Empty:
+                # An abandoned session must not hold a server thread forever
+                if self.idle():
+                    return
+                # Comment line keeps proxies from timing out and surfaces client disconnects
+                yield ": keepalive\n\n"
+                continue
+            if event == "closed":
+                return
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class StreamSessions:
+    """Live dictation sessions and the shared, bounded pool that transcribes their segments.
+
+    Idle sessions are expired on every start/get/submit, so an abandoned one is
+    closed (ending its event stream) as soon as any other request comes in.
+    """
+
+    def __init__(self, max_workers=4, idle_seconds=600):
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.idle_seconds = idle_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stream-stt")
+
+    def start(self, profile_name):
+        self._expire()
+        session = StreamSession(uuid.uuid4().hex, profile_name, self.idle_seconds)
+        with self.lock:
+            self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        self._expire()
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def submit(self, session, index, audio, filename, transcribe_fn):
+        """Transcribe one segment in the background; `transcribe_fn(filename, audio) -> text`."""
+        def run():
+            try:
+                text = transcribe_fn(filename, audio)
+            except Exception as e:
+                print(f"[Stream] Segment {index} failed: {e}")
+                session.segment_done(index, None, str(e))
+                raise
+            session.segment_done(index, text)
+            return text
+        self._expire()
+        session.add(index, self.executor.submit(run), len(audio))
+
+    def remove(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session:
+            session.close()
+
+    def _expire(self):
+        with self.lock:
+            stale = [s for s in self.sessions.values() if s.idle()]
+        for session in stale:
+            self.remove(session.id)